@@ -0,0 +1,115 @@
+"""
+Нагрузочный тест Tele2Client на локальном сервере tele2client.mock_server.
+Для каждого сценария выводятся количество вызовов и запросов к серверу в секунду, задержки p50/p99
+и потребление памяти. Для одного номера конкурентные вызовы объединяются (single flight), поэтому запросов
+к серверу меньше, чем вызовов; производительность HTTP-клиента показывает server requests/sec.
+
+Без установки пакета (pip install -e .) запускается из корня репозитория с PYTHONPATH=.:
+
+    PYTHONPATH=. python benchmarks/bench_api.py [--calls 2000] [--numbers 1000] [--concurrency 100] [--latency 0.01]
+
+С флагом --trace-memory пик памяти Python измеряется через tracemalloc (замедляет выполнение).
+"""
+import argparse
+import asyncio
+import gc
+import resource
+import time
+import tracemalloc
+from typing import Awaitable, Callable, List
+
+from tele2client.api import ApiSettings
+from tele2client.client import Tele2Client
+from tele2client.endpoints import EndpointRegistry
+from tele2client.mock_server import MockSettings, MockTele2Server
+from tele2client.pool import Tele2ClientPool
+
+
+def percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def run_calls(calls: List[Callable[[], Awaitable]], concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def run(call: Callable[[], Awaitable]):
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(run(call) for call in calls))
+    return latencies
+
+
+def report(name: str, latencies: List[float], elapsed: float, server: MockTele2Server, memory_peak: int = None):
+    print(f'{name}:')
+    print(f'  calls: {len(latencies)}, server requests: {server.request_count}')
+    print(f'  calls/sec: {len(latencies) / elapsed:.0f}')
+    print(f'  server requests/sec: {server.request_count / elapsed:.0f}')
+    print(f'  p50: {percentile(latencies, 50) * 1000:.2f} ms, p99: {percentile(latencies, 99) * 1000:.2f} ms')
+    print(f'  max rss: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB')
+    if memory_peak is not None:
+        print(f'  python memory peak: {memory_peak / 1024 / 1024:.1f} MiB')
+
+
+TRACE_MEMORY = False
+
+
+async def measure(name: str, server: MockTele2Server, workload: Callable[[], Awaitable[List[float]]]):
+    gc.collect()
+    server.request_count = 0
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    start = time.perf_counter()
+    latencies = await workload()
+    elapsed = time.perf_counter() - start
+    memory_peak = None
+    if TRACE_MEMORY:
+        memory_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    report(name, latencies, elapsed, server, memory_peak)
+
+
+async def bench_single_number(server: MockTele2Server, calls_count: int, concurrency: int):
+    settings = ApiSettings(endpoints=EndpointRegistry.from_base_url(server.url))
+    async with Tele2Client('79000000000', settings=settings) as client:
+        await client.auth_with_params(server.issue_token(client.phone_number))
+        methods = [client.get_balance, client.get_rests, client.get_lots]
+        calls = [methods[i % len(methods)] for i in range(calls_count)]
+        await measure('single number', server, lambda: run_calls(calls, concurrency))
+
+
+async def bench_fleet(server: MockTele2Server, numbers_count: int, concurrency: int):
+    settings = ApiSettings(endpoints=EndpointRegistry.from_base_url(server.url))
+    async with Tele2ClientPool(connections_limit=concurrency, settings=settings) as pool:
+        calls = []
+        for i in range(numbers_count):
+            client = pool.get_client(f'7901{i:07d}')
+            await client.auth_with_params(server.issue_token(client.phone_number))
+            calls.extend((client.get_balance, client.get_rests, client.get_lots))
+        await measure(f'{numbers_count} numbers', server, lambda: run_calls(calls, concurrency))
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--numbers', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--trace-memory', action='store_true')
+    args = parser.parse_args()
+
+    global TRACE_MEMORY
+    TRACE_MEMORY = args.trace_memory
+
+    async with MockTele2Server(MockSettings(latency=args.latency, error_rate=args.error_rate)) as server:
+        await bench_single_number(server, args.calls, args.concurrency)
+        await bench_fleet(server, args.numbers, args.concurrency)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+Нагрузочная проверка освобождения соединений: запросы с ошибками, удаление лотов и обычные запросы
+выполняются через пул с ограничением connections_limit. Если ответы не освобождаются сразу,
+пул исчерпывается и запросы зависают до таймаута.
+
+Без установки пакета (pip install -e .) запускается из корня репозитория с PYTHONPATH=.:
+
+    PYTHONPATH=. python benchmarks/bench_connection_pool.py [количество запросов] [connections_limit]
+"""
+import asyncio
+import random
+import sys
+import time
+
+from aiohttp import web
+
+from tele2client import exceptions
+from tele2client.api import ApiSettings, ApiTele2, create_connector, create_session
+from tele2client.endpoints import EndpointRegistry
+
+HOST = '127.0.0.1'
+PORT = 8091
+
+# Адреса клиентских сокетов: одно значение на каждое TCP-соединение
+client_sockets = set()
+
+
+async def balance(request: web.Request) -> web.Response:
+    client_sockets.add(request.transport.get_extra_info('peername'))
+    if random.random() < 0.5:
+        return web.json_response({'error': 'internal'}, status=500)
+    return web.json_response({'data': {'value': 100.0}})
+
+
+async def delete_lot(request: web.Request) -> web.Response:
+    client_sockets.add(request.transport.get_extra_info('peername'))
+    return web.json_response({'data': None})
+
+
+async def start_server() -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get('/api/subscribers/{phone_number}/balance', balance)
+    app.router.add_delete('/api/subscribers/{phone_number}/exchange/lots/created/{lot_id}', delete_lot)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, PORT).start()
+    return runner
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    runner = await start_server()
+    session = create_session(create_connector(limit))
+    settings = ApiSettings(endpoints=EndpointRegistry.from_base_url(f'http://{HOST}:{PORT}'))
+
+    async def call(i: int):
+        api = ApiTele2(session, f'7900{i % 100:07d}', settings=settings)
+        if i % 3 == 0:
+            return await api.delete_lot(str(i))
+        try:
+            return await api.get_balance()
+        except exceptions.ApiException as e:
+            return e
+
+    start = time.perf_counter()
+    results = await asyncio.wait_for(asyncio.gather(*(call(i) for i in range(count))), timeout=60)
+    elapsed = time.perf_counter() - start
+
+    errors = sum(isinstance(result, exceptions.ApiException) for result in results)
+    print(f'requests: {count}, errors: {errors}, elapsed: {elapsed:.2f} s')
+    print(f'connections limit: {limit}, opened: {len(client_sockets)}')
+    await session.close()
+    await runner.cleanup()
+    assert len(client_sockets) <= limit, 'соединения не возвращаются в пул'
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
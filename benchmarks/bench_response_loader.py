@@ -0,0 +1,81 @@
+"""
+Сравнение скорости response_loader.load_lots_info с прежней реализацией
+(dateutil.parser.parse для каждой даты, проверка ключей циклом, вызов Enum для каждого значения).
+
+Без установки пакета (pip install -e .) запускается из корня репозитория с PYTHONPATH=.:
+
+    PYTHONPATH=. python benchmarks/bench_response_loader.py [количество лотов]
+"""
+import random
+import sys
+import timeit
+from typing import Dict, List, Tuple
+
+from dateutil import parser
+
+from tele2client import containers, converter, exceptions, response_loader
+from tele2client.enums import LotStatus, TrafficType
+
+
+def _legacy_assert_keys(data: Dict, keys: Tuple[str, ...]):
+    for key in keys:
+        if key not in data:
+            raise exceptions.IncorrectFormatResponse(f'Не найдены параметры: {keys}', data)
+
+
+def _legacy_load_lot_info(data: Dict) -> containers.LotInfo:
+    _legacy_assert_keys(data, ('id', 'seller', 'trafficType', 'cost', 'status', 'creationDate'))
+    _legacy_assert_keys(data['seller'], ('name', 'emojis'))
+    _legacy_assert_keys(data['volume'], ('value', 'uom'))
+    _legacy_assert_keys(data['cost'], ('amount', 'currency'))
+    traffic_type = TrafficType(data['trafficType'])
+    return containers.LotInfo(
+        id=data['id'],
+        seller=containers.SellerLot(name=data['seller']['name'], emojis=data['seller']['emojis']),
+        type=converter.get_lot_type_by_traffic_type(traffic_type),
+        traffic_type=traffic_type,
+        volume=containers.LotVolume(count=data['volume']['value'], unit=data['volume']['uom']),
+        cost=containers.LotCost(amount=data['cost']['amount'], currency=data['cost']['currency']),
+        status=LotStatus(data['status']),
+        create_dt=parser.parse(data['creationDate'], ignoretz=True)
+    )
+
+
+def legacy_load_lots_info(data: List[Dict]) -> List[containers.LotInfo]:
+    return [_legacy_load_lot_info(item) for item in data]
+
+
+def create_lots_data(count: int) -> List[Dict]:
+    rnd = random.Random(0)
+    traffic_types = [traffic_type.value for traffic_type in TrafficType]
+    statuses = [status.value for status in LotStatus]
+    return [
+        {
+            'id': str(i),
+            'seller': {'name': None, 'emojis': ['cool']},
+            'trafficType': rnd.choice(traffic_types),
+            'volume': {'value': rnd.randint(1, 100), 'uom': 'gb'},
+            'cost': {'amount': rnd.randint(15, 500), 'currency': 'rub'},
+            'status': rnd.choice(statuses),
+            'creationDate': f'2021-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}T1{rnd.randint(0, 9)}:30:00.123+03:00'
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    data = create_lots_data(count)
+    assert legacy_load_lots_info(data) == response_loader.load_lots_info(data)
+
+    repeat = 5
+    legacy = min(timeit.repeat(lambda: legacy_load_lots_info(data), number=1, repeat=repeat))
+    current = min(timeit.repeat(lambda: response_loader.load_lots_info(data), number=1, repeat=repeat))
+    print(f'lots: {count}')
+    print(f'legacy:  {legacy * 1000:.1f} ms')
+    print(f'current: {current * 1000:.1f} ms')
+    print(f'speedup: {legacy / current:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -19,6 +19,9 @@ setup(
         'aiohttp',
         'python-dateutil',
     ],
+    extras_require={
+        'orjson': ['orjson'],
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
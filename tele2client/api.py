@@ -1,33 +1,311 @@
-from typing import List, NoReturn
-
-from aiohttp import ClientSession
-
-from tele2client import containers, exceptions, response_loader, request_creator
-
-
-def create_session(access_token: str = ''):
-    return ClientSession(headers=request_creator.create_headers(access_token))
+import asyncio
+from http import HTTPStatus
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, NoReturn, Tuple
+
+from aiohttp import BaseConnector, ClientSession, ClientTimeout, TCPConnector, TraceConfig
+from yarl import URL
+
+from tele2client import batch, conditional, containers, exceptions, json_utils, metrics
+from tele2client import response_loader, request_creator, scheduler, time_utils, timeouts
+from tele2client.cache import ResponseCache
+from tele2client.circuit_breaker import CircuitBreaker
+from tele2client.endpoints import DEFAULT_REGISTRY, EndpointRegistry, SubscriberUrls
+from tele2client.enums import Endpoint
+from tele2client.rate_limiter import RateLimiter
+from tele2client.retry import RETRY_ERRORS, RetryPolicy, parse_retry_after
+from tele2client.scheduler import RequestScheduler
+from tele2client.single_flight import SingleFlight
+from tele2client.timeouts import TimeoutPolicy
+
+DEFAULT_CONNECTIONS_LIMIT = 100
+
+
+class ApiSettings(NamedTuple):
+    """Общие для нескольких ApiTele2 компоненты"""
+    rate_limiter: RateLimiter = None
+    retry_policy: RetryPolicy = None
+    cache: ResponseCache = None
+    json_loads: Callable[[bytes], Any] = json_utils.loads
+    # Если не задан, каждый ApiTele2 объединяет только свои конкурентные запросы
+    single_flight: SingleFlight = None
+    metrics_sink: metrics.MetricsSink = None
+    # Хосты API, например, зеркала или локальный тестовый сервер (tele2client.mock_server)
+    endpoints: EndpointRegistry = DEFAULT_REGISTRY
+    # Если не задана, для всех методов используется timeouts.DEFAULT_TIMEOUT
+    timeouts: TimeoutPolicy = None
+    circuit_breaker: CircuitBreaker = None
+    # Общий лимит одновременных запросов с приоритетами (scheduler.priority)
+    scheduler: RequestScheduler = None
+
+
+def create_connector(limit: int = DEFAULT_CONNECTIONS_LIMIT, limit_per_host: int = 0) -> TCPConnector:
+    return TCPConnector(limit=limit, limit_per_host=limit_per_host)
+
+
+def create_session(connector: BaseConnector = None, json_serialize: Callable[[Any], str] = json_utils.dumps,
+                   metrics_sink: metrics.MetricsSink = None,
+                   timeout: ClientTimeout = timeouts.DEFAULT_TIMEOUT) -> ClientSession:
+    """
+    Заголовок Authorization не входит в заголовки сессии, а передается с каждым запросом,
+    поэтому одну сессию (и ее пул соединений) можно использовать для нескольких номеров.
+
+    :param metrics_sink: получатель метрик запросов и соединений сессии
+    :param timeout: таймаут запросов сессии вместо 5 минут по умолчанию в aiohttp
+    """
+    trace_configs = [create_pool_trace_config()]
+    if metrics_sink is not None:
+        trace_configs.append(metrics.create_trace_config(metrics_sink))
+    return ClientSession(
+        headers=request_creator.create_headers(),
+        connector=connector,
+        json_serialize=json_serialize,
+        trace_configs=trace_configs,
+        timeout=timeout
+    )
+
+
+def create_pool_trace_config() -> TraceConfig:
+    """
+    Отмечает в контексте запроса (metrics.create_request_context) ожидание свободного соединения пула:
+    таймаут во время этого ожидания вызван нагрузкой на клиент, а не ошибкой метода API
+    """
+
+    def set_waiting(trace_config_ctx: SimpleNamespace, waiting: bool):
+        request_ctx = trace_config_ctx.trace_request_ctx
+        if request_ctx is not None:
+            request_ctx.waiting_for_connection = waiting
+
+    async def on_connection_queued_start(session, trace_config_ctx, params):
+        set_waiting(trace_config_ctx, True)
+
+    async def on_connection_queued_end(session, trace_config_ctx, params):
+        set_waiting(trace_config_ctx, False)
+
+    trace_config = TraceConfig()
+    trace_config.on_connection_queued_start.append(on_connection_queued_start)
+    trace_config.on_connection_queued_end.append(on_connection_queued_end)
+    return trace_config
 
 
 class ApiTele2(object):
-    created_lots_url: str
-    rests_url: str
-    balance_url: str
-    validation_number_url: str
-    auth_url: str
+    urls: SubscriberUrls
     session: ClientSession
     phone_number: str
+    access_token: containers.AccessToken
+    settings: ApiSettings
 
-    def __init__(self, session: ClientSession, phone_number: str):
-        base_url = f'https://my.tele2.ru/api/subscribers/{phone_number}'
-        self.created_lots_url = f'{base_url}/exchange/lots/created'
-        self.rests_url = f'{base_url}/rests'
-        self.balance_url = f'{base_url}/balance'
-        self.validation_number_url = f'https://my.tele2.ru/api/validation/number/{phone_number}'
-        self.auth_url = 'https://my.tele2.ru/auth/realms/tele2-b2c/protocol/openid-connect/token'
+    def __init__(self, session: ClientSession, phone_number: str, access_token: containers.AccessToken = None,
+                 settings: ApiSettings = None):
+        self.settings = ApiSettings() if settings is None else settings
+        self.urls = self.settings.endpoints.get_urls(phone_number)
 
         self.session = session
         self.phone_number = phone_number
+        self.access_token = containers.AccessToken() if access_token is None else access_token
+        self._conditional_entries: Dict[Endpoint, conditional.ConditionalEntry] = {}
+        self._single_flight = SingleFlight() if self.settings.single_flight is None else self.settings.single_flight
+        self._timeouts = TimeoutPolicy() if self.settings.timeouts is None else self.settings.timeouts
+
+    async def _send(self, endpoint: Endpoint, method: str, url: URL, headers: Dict, trace_request_ctx: SimpleNamespace,
+                    **kwargs) -> containers.Response:
+        timeout = self._timeouts.get(endpoint)
+        # Общее время уменьшено до оставшегося срока: таймаут будет вызван сроком вызывающего, а не методом API
+        trace_request_ctx.limited_by_deadline = timeout is not self._timeouts.get_base(endpoint)
+        # Тело читается сразу, и при выходе из контекста соединение возвращается в пул
+        async with self.session.request(method, url, headers=headers, proxy=self.urls.proxy, timeout=timeout,
+                                        trace_request_ctx=trace_request_ctx, **kwargs) as response:
+            body = await response.read()
+            return containers.Response(
+                status=response.status,
+                reason=response.reason,
+                headers=response.headers,
+                body=body
+            )
+
+    async def _send_guarded(self, endpoint: Endpoint, method: str, url: URL, headers: Dict,
+                            **kwargs) -> containers.Response:
+        """
+        Выключатель проверяется до ожидания ограничителя скорости и слота планировщика,
+        поэтому запросы к отключенному методу не расходуют общий лимит
+
+        :raises:
+            CircuitOpen: если метод отключен автоматическим выключателем
+        """
+        trace_request_ctx = metrics.create_request_context(endpoint.value)
+        circuit_breaker = self.settings.circuit_breaker
+        if circuit_breaker is None:
+            return await self._send_limited(endpoint, method, url, headers, trace_request_ctx, **kwargs)
+
+        token = circuit_breaker.acquire(endpoint, self.phone_number)
+        try:
+            response = await self._send_limited(endpoint, method, url, headers, trace_request_ctx, **kwargs)
+        except RETRY_ERRORS as e:
+            if self._is_endpoint_failure(e, trace_request_ctx):
+                circuit_breaker.record_failure(token)
+            else:
+                circuit_breaker.release(token)
+            raise
+        except BaseException:
+            circuit_breaker.release(token)
+            raise
+        circuit_breaker.record(token, response.status)
+        return response
+
+    @staticmethod
+    def _is_endpoint_failure(error: BaseException, trace_request_ctx: SimpleNamespace) -> bool:
+        """
+        Ошибкой метода API считаются ошибки соединения и собственные таймауты метода,
+        но не ожидание соединения пула и не истечение срока вызывающего
+        """
+        if trace_request_ctx.waiting_for_connection:
+            return False
+        return not (isinstance(error, asyncio.TimeoutError) and trace_request_ctx.limited_by_deadline)
+
+    async def _send_limited(self, endpoint: Endpoint, method: str, url: URL, headers: Dict,
+                            trace_request_ctx: SimpleNamespace, **kwargs) -> containers.Response:
+        rate_limiter = self.settings.rate_limiter
+        if rate_limiter is not None:
+            await timeouts.wait(rate_limiter.acquire(self.phone_number))
+
+        request_scheduler = self.settings.scheduler
+        if request_scheduler is None:
+            return await self._send(endpoint, method, url, headers, trace_request_ctx, **kwargs)
+
+        # Слот занимается только на время запроса, а не на время ожидания повтора
+        await timeouts.wait(request_scheduler.acquire(scheduler.get_priority(endpoint, method), self.phone_number))
+        try:
+            return await self._send(endpoint, method, url, headers, trace_request_ctx, **kwargs)
+        finally:
+            request_scheduler.release()
+
+    async def _request(self, endpoint: Endpoint, method: str, url: URL, headers: Dict = None,
+                       **kwargs) -> containers.Response:
+        """
+        Повторы и ожидание ограничителя скорости выполняются только в пределах срока timeouts.deadline
+
+        :raises:
+            DeadlineExceeded: если срок выполнения истек до ответа
+            CircuitOpen: если метод отключен автоматическим выключателем
+        """
+        rate_limiter = self.settings.rate_limiter
+        retry_policy = self.settings.retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
+            if attempt > 1:
+                self._increment_metric(metrics.RETRIES, endpoint)
+            timeouts.check()
+            request_headers = request_creator.create_auth_headers(self.access_token.token)
+            if headers:
+                request_headers.update(headers)
+            try:
+                response = await self._send_guarded(endpoint, method, url, request_headers, **kwargs)
+            except RETRY_ERRORS as e:
+                timeouts.check()
+                if retry_policy is None or not retry_policy.should_retry_error(method) \
+                        or not retry_policy.can_retry(attempt):
+                    raise
+                delay = retry_policy.get_delay(attempt)
+                if not timeouts.allows(delay):
+                    raise exceptions.DeadlineExceeded('Истек срок выполнения запроса') from e
+                await asyncio.sleep(delay)
+                continue
+
+            if retry_policy is None or not retry_policy.should_retry_status(method, response.status) \
+                    or not retry_policy.can_retry(attempt):
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            delay = retry_policy.get_delay(attempt, retry_after)
+            if rate_limiter is not None and response.status == HTTPStatus.TOO_MANY_REQUESTS:
+                rate_limiter.block(self.phone_number, delay)
+            # Повтор до Retry-After запрещен сервером, а после окончания срока невозможен: возвращается последний ответ
+            if not retry_policy.can_wait(delay) or not timeouts.allows(delay):
+                return response
+            await asyncio.sleep(delay)
+
+    async def _get_shared(self, endpoint: Endpoint, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Конкурентные чтения одного метода для одного номера выполняются одним запросом
+        """
+        found, value = self._get_cached(endpoint)
+        if found:
+            return value
+
+        async def fetch_shared() -> Any:
+            # Общий запрос выполняется в задаче первого вызывающего и не должен наследовать его срок
+            with timeouts.no_deadline():
+                return await fetch()
+
+        # Срок ожидающего вызова ограничивает только его ожидание, а не общий запрос
+        return await timeouts.wait(self._single_flight.do((self.phone_number, endpoint), fetch_shared))
+
+    def _get_cached(self, endpoint: Endpoint) -> Tuple[bool, Any]:
+        if self.settings.cache is None:
+            return False, None
+        return self.settings.cache.get(self.phone_number, endpoint)
+
+    def _get_cache_version(self, endpoint: Endpoint) -> int:
+        if self.settings.cache is None:
+            return 0
+        return self.settings.cache.get_version(self.phone_number, endpoint)
+
+    def _set_cached(self, endpoint: Endpoint, value: Any, version: int = None):
+        """
+        :param version: версия кэша на момент начала чтения; результат не сохраняется, если с тех пор была запись
+        """
+        if self.settings.cache is not None:
+            self.settings.cache.set(self.phone_number, endpoint, value, version)
+
+    def _increment_metric(self, name: str, endpoint: Endpoint):
+        if self.settings.metrics_sink is not None:
+            self.settings.metrics_sink.increment(name, {'endpoint': endpoint.value})
+
+    def _load(self, endpoint: Endpoint, response: containers.Response, loader: Callable[[Any], Any],
+              has_data: bool = True) -> Any:
+        """
+        :param has_data: загружаемые данные находятся в параметре 'data' ответа
+        :raises:
+            IncorrectFormatResponse: если не удалось загрузить данные из ответа
+            FailedConversion: если не удалось преобразовать данные из ответа
+        """
+        start = time_utils.monotonic_timestamp()
+        try:
+            data = self._load_json(response)
+            return loader(response_loader.get_data(data) if has_data else data)
+        finally:
+            if self.settings.metrics_sink is not None:
+                duration = time_utils.monotonic_timestamp() - start
+                self.settings.metrics_sink.observe(metrics.PARSE_DURATION, duration, {'endpoint': endpoint.value})
+
+    def _load_json(self, response: containers.Response) -> Any:
+        """
+        :raises:
+            IncorrectFormatResponse: если тело ответа не является JSON
+        """
+        try:
+            return self.settings.json_loads(response.body)
+        except ValueError as e:
+            raise exceptions.IncorrectFormatResponse('Не удалось разобрать JSON ответа', response.body[:256]) from e
+
+    def _get_conditional_headers(self, endpoint: Endpoint) -> Dict:
+        return conditional.create_headers(self._conditional_entries.get(endpoint))
+
+    def _is_not_modified(self, endpoint: Endpoint, response: containers.Response) -> bool:
+        return response.status == HTTPStatus.NOT_MODIFIED and endpoint in self._conditional_entries
+
+    def _get_not_modified(self, endpoint: Endpoint) -> Any:
+        # Тело ответа 304 пустое: данные берутся из прошлого ответа без повторного разбора
+        value = self._conditional_entries[endpoint].value
+        return list(value) if isinstance(value, list) else value
+
+    def _set_conditional(self, endpoint: Endpoint, response: containers.Response, value: Any):
+        entry = conditional.create_entry(response.headers, list(value) if isinstance(value, list) else value)
+        if entry is None:
+            self._conditional_entries.pop(endpoint, None)
+        else:
+            self._conditional_entries[endpoint] = entry
 
     async def get_access_token(self, sms_code: str) -> containers.AccessToken:
         """
@@ -37,13 +315,28 @@ class ApiTele2(object):
         """
 
         request_json = request_creator.create_for_access(self.phone_number, sms_code)
-        response = await self.session.post(self.auth_url, data=request_json)
+        response = await self._request(Endpoint.TOKEN, 'POST', self.urls.auth, data=request_json)
 
         if response.ok:
-            return response_loader.load_access_token(await response.json())
+            return self._load(Endpoint.TOKEN, response, response_loader.load_access_token, has_data=False)
 
         raise exceptions.ApiException(f'Не удалось получить токен для: {self.phone_number}', response, request_json)
 
+    async def refresh_access_token(self, refresh_token: str) -> containers.AccessToken:
+        """
+        :raises:
+            ApiException: если не удалось выполнить запрос
+            IncorrectFormatResponse: если не удалось загрузить данные из ответа
+        """
+
+        request_json = request_creator.create_for_refresh_access(refresh_token)
+        response = await self._request(Endpoint.TOKEN, 'POST', self.urls.auth, data=request_json)
+
+        if response.ok:
+            return self._load(Endpoint.TOKEN, response, response_loader.load_access_token, has_data=False)
+
+        raise exceptions.ApiException(f'Не удалось обновить токен для: {self.phone_number}', response)
+
     async def request_sms_code(self) -> NoReturn:
         """
         :raises:
@@ -51,7 +344,8 @@ class ApiTele2(object):
         """
 
         request_json = request_creator.create_for_request_sms()
-        response = await self.session.post(self.validation_number_url, json=request_json)
+        url = self.urls.validation_number
+        response = await self._request(Endpoint.VALIDATION_NUMBER, 'POST', url, json=request_json)
         if not response.ok:
             message = f'Не удалось отправить смс подтверждение для: {self.phone_number}'
             raise exceptions.ApiException(message, response, request_json)
@@ -62,10 +356,15 @@ class ApiTele2(object):
             ApiException: если не удалось выполнить запрос
             IncorrectFormatResponse: если не удалось загрузить данные из ответа
         """
+        return await self._get_shared(Endpoint.BALANCE, self._fetch_balance)
 
-        response = await self.session.get(self.balance_url)
+    async def _fetch_balance(self) -> float:
+        version = self._get_cache_version(Endpoint.BALANCE)
+        response = await self._request(Endpoint.BALANCE, 'GET', self.urls.balance)
         if response.ok:
-            return response_loader.load_balance(response_loader.get_data(await response.json()))
+            balance = self._load(Endpoint.BALANCE, response, response_loader.load_balance)
+            self._set_cached(Endpoint.BALANCE, balance, version)
+            return balance
 
         raise exceptions.ApiException(f'Не удалось получить баланс для: {self.phone_number}', response)
 
@@ -78,9 +377,13 @@ class ApiTele2(object):
         """
 
         request_json = request_creator.create_for_lot_creation(lot)
-        response = await self.session.put(self.created_lots_url, json=request_json)
+        response = await self._request(Endpoint.LOTS, 'PUT', self.urls.created_lots, json=request_json)
         if response.ok:
-            return response_loader.load_lot_info(response_loader.get_data(await response.json()))
+            lot_info = self._load(Endpoint.LOTS, response, response_loader.load_lot_info)
+            if self.settings.cache is not None:
+                self.settings.cache.add_lot(self.phone_number, lot_info)
+                self.settings.cache.invalidate(self.phone_number, Endpoint.RESTS)
+            return lot_info
 
         raise exceptions.ApiException(f'Не удалось создать лот для: {self.phone_number}', response, request_json)
 
@@ -93,20 +396,49 @@ class ApiTele2(object):
         """
 
         request_json = request_creator.create_for_edit_lot(lot_info)
-        response = await self.session.put(self._get_lot_url(lot_info.id), json=request_json)
+        response = await self._request(Endpoint.LOT, 'PUT', self.urls.lot(lot_info.id), json=request_json)
 
         if response.ok:
-            return response_loader.load_lot_info(response_loader.get_data(await response.json()))
+            lot_info = self._load(Endpoint.LOT, response, response_loader.load_lot_info)
+            if self.settings.cache is not None:
+                self.settings.cache.replace_lot(self.phone_number, lot_info)
+            return lot_info
 
         message = f'Не удалось отредактировать лот для: {self.phone_number}'
         raise exceptions.ApiException(message, response, request_json)
 
     async def delete_lot(self, lot_id: str) -> bool:
-        response = await self.session.delete(self._get_lot_url(lot_id))
-        return response.ok
+        return (await self._delete_lot(lot_id)).ok
+
+    async def _delete_lot(self, lot_id: str) -> containers.Response:
+        response = await self._request(Endpoint.LOT, 'DELETE', self.urls.lot(lot_id))
+        if response.ok and self.settings.cache is not None:
+            self.settings.cache.revoke_lot(self.phone_number, lot_id)
+            self.settings.cache.invalidate(self.phone_number, Endpoint.RESTS)
+        return response
+
+    async def _delete_lot_or_raise(self, lot_id: str) -> bool:
+        """
+        :raises:
+            ApiException: если не удалось удалить лот
+        """
+        response = await self._delete_lot(lot_id)
+        if not response.ok:
+            raise exceptions.ApiException(f'Не удалось удалить лот {lot_id} для: {self.phone_number}', response)
+        return True
+
+    async def create_lots(self, lots: Iterable[containers.Lot],
+                          concurrency: int = batch.DEFAULT_CONCURRENCY) -> List[containers.BatchResult]:
+        return await batch.run(self.create_lot, lots, concurrency)
 
-    def _get_lot_url(self, lot_id: str):
-        return f'{self.created_lots_url}/{lot_id}'
+    async def edit_lots(self, lot_infos: Iterable[containers.LotInfo],
+                        concurrency: int = batch.DEFAULT_CONCURRENCY) -> List[containers.BatchResult]:
+        return await batch.run(self.edit_lot, lot_infos, concurrency)
+
+    async def delete_lots(self, lot_ids: Iterable[str],
+                          concurrency: int = batch.DEFAULT_CONCURRENCY) -> List[containers.BatchResult]:
+        # Неудачное удаление сохраняется в результате как ошибка, а не как value=False
+        return await batch.run(self._delete_lot_or_raise, lot_ids, concurrency)
 
     async def get_lots(self) -> List[containers.LotInfo]:
         """
@@ -115,10 +447,22 @@ class ApiTele2(object):
             IncorrectFormatResponse: если не удалось загрузить данные из ответа
             FailedConversion: если не удалось преобразовать данные из ответа
         """
+        return await self._get_shared(Endpoint.LOTS, self._fetch_lots)
+
+    async def _fetch_lots(self) -> List[containers.LotInfo]:
+        version = self._get_cache_version(Endpoint.LOTS)
+        headers = self._get_conditional_headers(Endpoint.LOTS)
+        response = await self._request(Endpoint.LOTS, 'GET', self.urls.created_lots, headers=headers)
+        if self._is_not_modified(Endpoint.LOTS, response):
+            lots = self._get_not_modified(Endpoint.LOTS)
+            self._set_cached(Endpoint.LOTS, lots, version)
+            return lots
 
-        response = await self.session.get(self.created_lots_url)
         if response.ok:
-            return response_loader.load_lots_info(response_loader.get_data(await response.json()))
+            lots = self._load(Endpoint.LOTS, response, response_loader.load_lots_info)
+            self._set_conditional(Endpoint.LOTS, response, lots)
+            self._set_cached(Endpoint.LOTS, lots, version)
+            return lots
 
         raise exceptions.ApiException(f'Не удалось получить лоты для: {self.phone_number}', response)
 
@@ -130,9 +474,21 @@ class ApiTele2(object):
             ApiException: если не удалось выполнить запрос
             IncorrectFormatResponse: если не удалось загрузить данные из ответа
         """
+        return await self._get_shared(Endpoint.RESTS, self._fetch_rests)
+
+    async def _fetch_rests(self) -> List[containers.Remain]:
+        version = self._get_cache_version(Endpoint.RESTS)
+        headers = self._get_conditional_headers(Endpoint.RESTS)
+        response = await self._request(Endpoint.RESTS, 'GET', self.urls.rests, headers=headers)
+        if self._is_not_modified(Endpoint.RESTS, response):
+            rests = self._get_not_modified(Endpoint.RESTS)
+            self._set_cached(Endpoint.RESTS, rests, version)
+            return rests
 
-        response = await self.session.get(self.rests_url)
         if response.ok:
-            return response_loader.load_rests(response_loader.get_data(await response.json()))
+            rests = self._load(Endpoint.RESTS, response, response_loader.load_rests)
+            self._set_conditional(Endpoint.RESTS, response, rests)
+            self._set_cached(Endpoint.RESTS, rests, version)
+            return rests
 
         raise exceptions.ApiException('Не удалось получить инфтрмацию об остатках для: {self.phone_number}', response)
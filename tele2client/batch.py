@@ -0,0 +1,28 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, List
+
+from aiohttp import ClientError
+
+from tele2client import containers, exceptions
+
+DEFAULT_CONCURRENCY = 10
+# Ошибки, которые сохраняются в результате элемента и не прерывают выполнение пакета
+BATCH_ERRORS = (exceptions.BaseTele2ClientException, ClientError, asyncio.TimeoutError)
+
+
+async def run(func: Callable[[Any], Awaitable[Any]], items: Iterable[Any],
+              concurrency: int = DEFAULT_CONCURRENCY) -> List[containers.BatchResult]:
+    """
+    Выполняет func для каждого элемента, одновременно не более concurrency вызовов.
+    Результаты возвращаются в порядке элементов.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_item(item: Any) -> containers.BatchResult:
+        async with semaphore:
+            try:
+                return containers.BatchResult(item=item, value=await func(item))
+            except BATCH_ERRORS as e:
+                return containers.BatchResult(item=item, error=e)
+
+    return list(await asyncio.gather(*(run_item(item) for item in items)))
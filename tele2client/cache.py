@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+from tele2client import containers, time_utils
+from tele2client.enums import Endpoint, LotStatus
+
+DEFAULT_TTLS = {
+    Endpoint.BALANCE: 30.0,
+    Endpoint.RESTS: 60.0,
+    Endpoint.LOTS: 30.0,
+}
+
+
+def _copy(value: Any) -> Any:
+    # Списки копируются, чтобы изменения у вызывающего кода не попадали в кэш
+    return list(value) if isinstance(value, list) else value
+
+
+class ResponseCache(object):
+    """
+    Кэш ответов API с временем жизни для каждого метода и вытеснением давно неиспользуемых записей (LRU).
+    Один экземпляр может использоваться для многих номеров.
+
+    Каждое изменение (запись через add_lot/replace_lot/revoke_lot, invalidate) увеличивает версию
+    пары номер-метод. Чтение, начатое до изменения, передает в set свою версию и не сохраняется,
+    иначе устаревший список заменил бы результат изменения на все время жизни записи.
+    """
+
+    max_size: int
+    ttls: Dict[Endpoint, float]
+
+    def __init__(self, max_size: int = 10000, ttls: Dict[Endpoint, float] = None):
+        self.max_size = max_size
+        self.ttls = dict(DEFAULT_TTLS) if ttls is None else ttls
+        self._entries: OrderedDict = OrderedDict()
+        self._versions: Dict[Tuple[str, Endpoint], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, phone_number: str, endpoint: Endpoint) -> Tuple[bool, Any]:
+        """
+        :return: (найдено ли значение, значение)
+        """
+        key = (phone_number, endpoint)
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expired_timestamp, value = entry
+        if time_utils.monotonic_timestamp() >= expired_timestamp:
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, _copy(value)
+
+    def get_version(self, phone_number: str, endpoint: Endpoint) -> int:
+        return self._versions.get((phone_number, endpoint), 0)
+
+    def _increment_version(self, phone_number: str, endpoint: Endpoint):
+        key = (phone_number, endpoint)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def set(self, phone_number: str, endpoint: Endpoint, value: Any, version: int = None):
+        """
+        :param version: get_version на момент начала запроса; если с тех пор кэш изменялся, значение не сохраняется
+        """
+        ttl = self.ttls.get(endpoint, 0)
+        if ttl <= 0:
+            return
+        if version is not None and version != self.get_version(phone_number, endpoint):
+            return
+
+        key = (phone_number, endpoint)
+        self._entries[key] = (time_utils.monotonic_timestamp() + ttl, _copy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, phone_number: str, endpoint: Endpoint = None):
+        if endpoint is not None:
+            self._increment_version(phone_number, endpoint)
+            self._entries.pop((phone_number, endpoint), None)
+            return
+
+        for endpoint in Endpoint:
+            self._increment_version(phone_number, endpoint)
+        for key in [key for key in self._entries if key[0] == phone_number]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def _update_lots(self, phone_number: str,
+                     update: Callable[[List[containers.LotInfo]], List[containers.LotInfo]]):
+        # Версия увеличивается и без записи в кэше: выполняющееся чтение не должно сохранить список без изменения
+        self._increment_version(phone_number, Endpoint.LOTS)
+        key = (phone_number, Endpoint.LOTS)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+
+        # Время жизни не продлевается: изменяется только содержимое закэшированного списка
+        expired_timestamp, lots = entry
+        self._entries[key] = (expired_timestamp, update(lots))
+
+    def add_lot(self, phone_number: str, lot_info: containers.LotInfo):
+        self._update_lots(phone_number, lambda lots: lots + [lot_info])
+
+    def replace_lot(self, phone_number: str, lot_info: containers.LotInfo):
+        self._update_lots(
+            phone_number,
+            lambda lots: [lot_info if lot.id == lot_info.id else lot for lot in lots]
+        )
+
+    def revoke_lot(self, phone_number: str, lot_id: str):
+        # Удаленный лот остается в списке лотов API со статусом REVOKED
+        self._update_lots(
+            phone_number,
+            lambda lots: [lot._replace(status=LotStatus.REVOKED) if lot.id == lot_id else lot for lot in lots]
+        )
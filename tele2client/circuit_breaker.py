@@ -0,0 +1,172 @@
+"""
+Автоматический выключатель (circuit breaker) для методов API.
+
+После failure_threshold ошибок подряд метод переходит в состояние OPEN, и запросы к нему
+сразу завершаются исключением CircuitOpen. Через cooldown секунд выключатель переходит в HALF_OPEN
+и пропускает один пробный запрос: при успехе метод снова доступен (CLOSED), при ошибке - снова OPEN.
+"""
+from http import HTTPStatus
+from typing import Callable, Dict, FrozenSet, NamedTuple, Optional, Tuple
+
+from tele2client import containers, exceptions, metrics, time_utils
+from tele2client.enums import CircuitState, Endpoint
+
+CircuitKey = Tuple[Endpoint, Optional[str]]
+
+FAILURE_STATUSES = frozenset((
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT
+))
+
+
+class CircuitToken(NamedTuple):
+    """Разрешение на запрос, выданное CircuitBreaker.acquire"""
+    key: CircuitKey
+    # Номер открытия выключателя на момент выдачи: результаты запросов, начатых до открытия, не учитываются
+    generation: int
+    # Пробный запрос в состоянии HALF_OPEN - только он может закрыть выключатель
+    probe: bool = False
+
+
+class Circuit(object):
+    state: CircuitState
+    failures: int
+    opened_at: float
+    probing: bool
+    generation: int
+
+    def __init__(self):
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.generation = 0
+
+
+class CircuitBreaker(object):
+    """
+    Состояние отслеживается для каждого метода API, а при per_subscriber=True - для каждой пары метод-номер
+    """
+
+    failure_threshold: int
+    cooldown: float
+    per_subscriber: bool
+    failure_statuses: FrozenSet[int]
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0, per_subscriber: bool = False,
+                 failure_statuses: FrozenSet[int] = FAILURE_STATUSES,
+                 on_transition: Callable[[containers.CircuitTransition], None] = None,
+                 metrics_sink: metrics.MetricsSink = None):
+        """
+        :param on_transition: вызывается при каждом изменении состояния
+        :param metrics_sink: получатель метрики metrics.CIRCUIT_TRANSITIONS
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.per_subscriber = per_subscriber
+        self.failure_statuses = failure_statuses
+        self._on_transition = on_transition
+        self._metrics_sink = metrics_sink
+        self._circuits: Dict[CircuitKey, Circuit] = {}
+
+    def _get_key(self, endpoint: Endpoint, phone_number: str = None) -> CircuitKey:
+        return endpoint, phone_number if self.per_subscriber else None
+
+    def _get_circuit(self, key: CircuitKey) -> Circuit:
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = Circuit()
+            self._circuits[key] = circuit
+        return circuit
+
+    def _set_state(self, key: CircuitKey, circuit: Circuit, state: CircuitState):
+        if circuit.state == state:
+            return
+
+        transition = containers.CircuitTransition(
+            endpoint=key[0],
+            phone_number=key[1],
+            previous=circuit.state,
+            state=state,
+            timestamp=time_utils.now_timestamp()
+        )
+        circuit.state = state
+        if self._metrics_sink is not None:
+            self._metrics_sink.increment(metrics.CIRCUIT_TRANSITIONS, {'endpoint': key[0].value, 'state': state.value})
+        if self._on_transition is not None:
+            self._on_transition(transition)
+
+    def get_state(self, endpoint: Endpoint, phone_number: str = None) -> CircuitState:
+        circuit = self._circuits.get(self._get_key(endpoint, phone_number))
+        return CircuitState.CLOSED if circuit is None else circuit.state
+
+    def get_states(self) -> Dict[CircuitKey, CircuitState]:
+        return {key: circuit.state for key, circuit in self._circuits.items()}
+
+    def acquire(self, endpoint: Endpoint, phone_number: str = None) -> CircuitToken:
+        """
+        Разрешение на запрос; результат запроса передается в record или record_failure,
+        а если результат не относится к методу API (например, отмена запроса) - в release
+
+        :raises:
+            CircuitOpen: если метод отключен или уже выполняется пробный запрос
+        """
+        key = self._get_key(endpoint, phone_number)
+        circuit = self._get_circuit(key)
+        if circuit.state == CircuitState.CLOSED:
+            return CircuitToken(key, circuit.generation)
+
+        if circuit.state == CircuitState.OPEN:
+            retry_after = circuit.opened_at + self.cooldown - time_utils.monotonic_timestamp()
+            if retry_after > 0:
+                raise exceptions.CircuitOpen(f'Метод {endpoint.value} временно отключен', retry_after)
+            self._set_state(key, circuit, CircuitState.HALF_OPEN)
+
+        if circuit.probing:
+            raise exceptions.CircuitOpen(f'Метод {endpoint.value} временно отключен', self.cooldown)
+        circuit.probing = True
+        return CircuitToken(key, circuit.generation, probe=True)
+
+    def _get_current(self, token: CircuitToken) -> Optional[Circuit]:
+        circuit = self._circuits.get(token.key)
+        if circuit is None or circuit.generation != token.generation:
+            return None
+        # В состояниях OPEN и HALF_OPEN учитывается только результат пробного запроса
+        if circuit.state != CircuitState.CLOSED and not token.probe:
+            return None
+        return circuit
+
+    def record(self, token: CircuitToken, status: int):
+        if status in self.failure_statuses:
+            self.record_failure(token)
+        else:
+            self.record_success(token)
+
+    def record_success(self, token: CircuitToken):
+        circuit = self._get_current(token)
+        if circuit is None:
+            return
+        circuit.failures = 0
+        circuit.probing = False
+        self._set_state(token.key, circuit, CircuitState.CLOSED)
+
+    def record_failure(self, token: CircuitToken):
+        circuit = self._get_current(token)
+        if circuit is None:
+            return
+        circuit.failures += 1
+        circuit.probing = False
+        if token.probe or circuit.failures >= self.failure_threshold:
+            circuit.opened_at = time_utils.monotonic_timestamp()
+            circuit.generation += 1
+            self._set_state(token.key, circuit, CircuitState.OPEN)
+
+    def release(self, token: CircuitToken):
+        """
+        Запрос завершился без результата для метода API: следующий вызов может снова выполнить пробный запрос
+        """
+        circuit = self._get_current(token)
+        if circuit is not None and token.probe:
+            circuit.probing = False
@@ -1,10 +1,13 @@
+import asyncio
 from http import HTTPStatus
-from typing import Any, Callable, Coroutine, List
+from typing import Any, AsyncIterator, Callable, Coroutine, Iterable, List, Optional, Tuple
 
 from aiohttp import ClientSession
 
-from tele2client import containers, enums, exceptions, time_utils
-from tele2client.api import ApiTele2, create_session
+from tele2client import batch, containers, enums, exceptions, lot_diff, reconciler, time_utils
+from tele2client.api import ApiSettings, ApiTele2, create_session
+from tele2client.rate_limiter import TokenBucket
+from tele2client.token_store import BaseTokenStore
 from tele2client.wrappers import LoggerWrap
 
 SmsCodeGetterType = Callable[[], Coroutine[Any, Any, str]]
@@ -12,16 +15,42 @@ SmsCodeGetterType = Callable[[], Coroutine[Any, Any, str]]
 
 class Tele2Client(object):
     ENTER_SMS_CODE_TIMEOUT = 60
+    # Пауза между запросами смс-кода: начальная и максимальная
+    SMS_CODE_POLL_DELAY = 1
+    SMS_CODE_POLL_MAX_DELAY = 10
+    WATCH_LOTS_INTERVAL = 60
+    # За сколько секунд до истечения токена он будет обновлен
+    TOKEN_REFRESH_AHEAD = 60
+    # Пауза перед повторной попыткой обновления токена после неудачи
+    TOKEN_REFRESH_RETRY_DELAY = 10
+    # Время, в течение которого используется результат проверки авторизации запросом к API
+    AUTHORIZED_CHECK_TTL = 10
 
     api: ApiTele2
     session: ClientSession
+    settings: ApiSettings
+    token_store: BaseTokenStore
     phone_number: str
-    access_token: containers.AccessToken
 
-    def __init__(self, phone_number: str):
+    def __init__(self, phone_number: str, session: ClientSession = None, settings: ApiSettings = None,
+                 token_store: BaseTokenStore = None):
+        """
+        :param session: общая сессия (например, из Tele2ClientPool); клиент ее не закрывает
+        :param settings: общие компоненты API: ограничение скорости, повтор запросов
+        :param token_store: хранилище, в которое сохраняется каждый новый токен
+        """
         self.phone_number = phone_number
-        self.access_token = containers.AccessToken()
-        self._create_session()
+        self.settings = settings
+        self.token_store = token_store
+        self._own_session = session is None
+        self._refresh_lock = asyncio.Lock()
+        self._next_refresh_timestamp = 0.0
+        self._authorized_probe: Optional[asyncio.Future] = None
+        self._authorized_check: Tuple[str, float, bool] = ('', 0.0, False)
+        if session is None:
+            session = create_session(metrics_sink=None if settings is None else settings.metrics_sink)
+        self.session = session
+        self.api = ApiTele2(self.session, self.phone_number, settings=self.settings)
 
     async def __aenter__(self):
         return self
@@ -30,56 +59,151 @@ class Tele2Client(object):
         await self.close()
 
     async def close(self):
-        if self.session is not None:
+        if self._own_session and self.session is not None:
             await self.session.close()
 
-    def _create_session(self):
-        self.session = create_session(self.access_token.token)
-        self.api = ApiTele2(self.session, self.phone_number)
+    @property
+    def access_token(self) -> containers.AccessToken:
+        return self.api.access_token
 
-    async def _refresh_session(self):
-        await self.close()
-        self._create_session()
+    @access_token.setter
+    def access_token(self, access_token: containers.AccessToken):
+        # Токен читается ApiTele2 при каждом запросе, поэтому сессию пересоздавать не нужно
+        self.api.access_token = access_token
+        if self.token_store is not None and access_token.token:
+            self.token_store.save(self.phone_number, access_token)
 
     async def auth_with_params(self, access_token: containers.AccessToken, phone_number: str = None):
-        if phone_number is not None:
+        if phone_number is not None and phone_number != self.phone_number:
             self.phone_number = phone_number
+            self.api = ApiTele2(self.session, self.phone_number, settings=self.settings)
         self.access_token = access_token
-        await self._refresh_session()
 
-    async def auth(self, sms_code_getter: SmsCodeGetterType) -> bool:
+    async def auth(self, sms_code_getter: SmsCodeGetterType, limiter: TokenBucket = None) -> bool:
+        """
+        Авторизация по смс-коду. Вызов можно отменить (asyncio.Task.cancel), ожидание кода при этом прерывается.
+
+        :param limiter: общий для нескольких номеров ограничитель запросов к методам авторизации
+        """
         try:
-            self.access_token = await self._get_access_token(sms_code_getter)
+            self.access_token = await self._get_access_token(sms_code_getter, limiter)
         except exceptions.BaseTele2ClientException as e:
             LoggerWrap().get_logger().exception(str(e))
             return False
-        await self._refresh_session()
         return True
 
-    async def _get_access_token(self, sms_code_getter: SmsCodeGetterType) -> containers.AccessToken:
+    def _need_refresh_token(self) -> bool:
+        access_token = self.access_token
+        if not access_token.refresh_token or access_token.expired_dt is None:
+            return False
+        if not time_utils.is_expired_timestamp(self._next_refresh_timestamp):
+            return False
+        return time_utils.is_expiring(access_token.expired_dt, self.TOKEN_REFRESH_AHEAD)
+
+    async def refresh_token(self) -> bool:
+        """
+        Обновляет токен доступа с помощью refresh_token, не пересоздавая сессию.
+        При ошибке повторная попытка выполняется не раньше чем через TOKEN_REFRESH_RETRY_DELAY секунд.
+        """
+        refresh_token = self.access_token.refresh_token
+        if not refresh_token:
+            return False
+
+        try:
+            self.access_token = await self.api.refresh_access_token(refresh_token)
+        except batch.BATCH_ERRORS as e:
+            # Включая ошибки соединения: до истечения используется текущий токен
+            LoggerWrap().get_logger().exception(str(e))
+            self._next_refresh_timestamp = time_utils.future_timestamp(self.TOKEN_REFRESH_RETRY_DELAY)
+            return False
+        return True
+
+    async def _ensure_token(self):
+        """
+        Заранее обновляет токен, если он скоро истечет. Конкурентные вызовы выполняют одно обновление.
+        """
+        if not self._need_refresh_token():
+            return
+
+        async with self._refresh_lock:
+            if self._need_refresh_token():
+                await self.refresh_token()
+
+    async def _get_access_token(self, sms_code_getter: SmsCodeGetterType,
+                                limiter: TokenBucket = None) -> containers.AccessToken:
+        """
+        Код запрашивается у sms_code_getter с паузой, которая увеличивается после каждой неудачной попытки.
+        Пустые и отклоненные API коды не отправляются повторно.
+        """
+        if limiter is not None:
+            await limiter.acquire()
         await self.api.request_sms_code()
+
         deadline = time_utils.future_timestamp(self.ENTER_SMS_CODE_TIMEOUT)
+        delay = self.SMS_CODE_POLL_DELAY
+        checked_codes = set()
         while not time_utils.is_expired_timestamp(deadline):
-            sms_code = await sms_code_getter()
             try:
-                return await self.api.get_access_token(sms_code)
-            except exceptions.IncorrectFormatResponse as e:
-                LoggerWrap().get_logger().exception(str(e))
-                continue
-            except exceptions.ApiException as e:
-                if e.response.status != HTTPStatus.UNAUTHORIZED:
+                sms_code = await asyncio.wait_for(sms_code_getter(), deadline - time_utils.now_timestamp())
+            except asyncio.TimeoutError:
+                break
+
+            if sms_code and sms_code not in checked_codes:
+                if limiter is not None:
+                    await limiter.acquire()
+                try:
+                    return await self.api.get_access_token(sms_code)
+                except exceptions.IncorrectFormatResponse as e:
                     LoggerWrap().get_logger().exception(str(e))
-                continue
+                except exceptions.ApiException as e:
+                    # Повторно не отправляется только отклоненный код; после временной ошибки код проверяется снова
+                    if e.response.status == HTTPStatus.UNAUTHORIZED:
+                        checked_codes.add(sms_code)
+                    else:
+                        LoggerWrap().get_logger().exception(str(e))
+
+            await asyncio.sleep(max(min(delay, deadline - time_utils.now_timestamp()), 0))
+            delay = min(delay * 2, self.SMS_CODE_POLL_MAX_DELAY)
 
         raise exceptions.TimeExpired('Истекло время на получение токена достута')
 
-    async def is_authorized(self) -> bool:
+    async def is_authorized(self, force_check: bool = False) -> bool:
+        """
+        Если известен срок действия токена, проверка выполняется без запроса к API.
+        Иначе (или при force_check) выполняется один проверочный запрос на всех конкурентных вызывающих,
+        результат которого запоминается на AUTHORIZED_CHECK_TTL секунд.
+        """
+        if not self.access_token.token:
+            return False
+
+        await self._ensure_token()
+        access_token = self.access_token
+        if not force_check and access_token.expired_dt is not None:
+            return not time_utils.is_expired(access_token.expired_dt)
+
+        checked_token, expired_timestamp, is_authorized = self._authorized_check
+        if checked_token == access_token.token and not time_utils.is_expired_timestamp(expired_timestamp):
+            return is_authorized
+
+        if self._authorized_probe is None:
+            self._authorized_probe = asyncio.ensure_future(self._check_authorized(access_token.token))
+        probe = self._authorized_probe
+        try:
+            return await asyncio.shield(probe)
+        finally:
+            if probe.done() and self._authorized_probe is probe:
+                self._authorized_probe = None
+
+    async def _check_authorized(self, token: str) -> bool:
         try:
-            await self.get_balance()
+            await self.api.get_balance()
+            is_authorized = True
         except exceptions.BaseTele2ClientException as e:
-            LoggerWrap().get_logger().exception(str(e))
-            return False
-        return True
+            LoggerWrap().get_logger().warning(f'Проверка авторизации не пройдена для {self.phone_number}: {e}')
+            is_authorized = False
+
+        self._authorized_check = (token, time_utils.future_timestamp(self.AUTHORIZED_CHECK_TTL), is_authorized)
+        return is_authorized
 
     async def get_balance(self) -> float:
         """
@@ -87,6 +211,7 @@ class Tele2Client(object):
             ApiException: если не удалось выполнить запрос
             IncorrectFormatResponse: если не удалось загрузить данные из ответа
         """
+        await self._ensure_token()
         return await self.api.get_balance()
 
     async def create_lot(self, lot: containers.Lot) -> containers.LotInfo:
@@ -96,6 +221,7 @@ class Tele2Client(object):
            IncorrectFormatResponse: если не удалось загрузить данные из ответа
            FailedConversion: если не удалось создать тело запроса
         """
+        await self._ensure_token()
         return await self.api.create_lot(lot)
 
     async def edit_lot(self, lot_info: containers.LotInfo) -> containers.LotInfo:
@@ -105,11 +231,50 @@ class Tele2Client(object):
            IncorrectFormatResponse: если не удалось загрузить данные из ответа
            FailedConversion: если не удалось преобразовать данные из ответа
         """
+        await self._ensure_token()
         return await self.api.edit_lot(lot_info)
 
     async def delete_lot(self, lot_id: str) -> bool:
+        await self._ensure_token()
         return await self.api.delete_lot(lot_id)
 
+    async def create_lots(self, lots: Iterable[containers.Lot],
+                          concurrency: int = batch.DEFAULT_CONCURRENCY) -> List[containers.BatchResult]:
+        """
+        Создает лоты параллельно. Ошибки сохраняются в результатах и не прерывают выполнение.
+        """
+        await self._ensure_token()
+        return await self.api.create_lots(lots, concurrency)
+
+    async def edit_lots(self, lot_infos: Iterable[containers.LotInfo],
+                        concurrency: int = batch.DEFAULT_CONCURRENCY) -> List[containers.BatchResult]:
+        """
+        Редактирует лоты параллельно. Ошибки сохраняются в результатах и не прерывают выполнение.
+        """
+        await self._ensure_token()
+        return await self.api.edit_lots(lot_infos, concurrency)
+
+    async def delete_lots(self, lot_ids: Iterable[str],
+                          concurrency: int = batch.DEFAULT_CONCURRENCY) -> List[containers.BatchResult]:
+        """
+        Удаляет лоты параллельно. Ошибки сохраняются в результатах и не прерывают выполнение.
+        """
+        await self._ensure_token()
+        return await self.api.delete_lots(lot_ids, concurrency)
+
+    async def reconcile_lots(self, desired: Iterable[containers.Lot], emojis: List[str] = None,
+                             concurrency: int = batch.DEFAULT_CONCURRENCY) -> containers.ReconcileResult:
+        """
+        Приводит активные лоты к желаемым минимальным количеством вызовов API
+
+        :param emojis: эмодзи для всех лотов; если не заданы, эмодзи лотов не меняются
+        :raises:
+            ApiException: если не удалось получить текущие лоты
+            IncorrectFormatResponse: если не удалось загрузить данные из ответа
+        """
+        plan = reconciler.create_plan(desired, await self.get_lots(), emojis)
+        return await reconciler.apply_plan(self, plan, concurrency)
+
     async def get_lots(self) -> List[containers.LotInfo]:
         """
         :raises:
@@ -117,8 +282,37 @@ class Tele2Client(object):
             IncorrectFormatResponse: если не удалось загрузить данные из ответа
             FailedConversion: если не удалось преобразовать данные из ответа
         """
+        await self._ensure_token()
         return await self.api.get_lots()
 
+    async def watch_lots(self, interval: float = None,
+                         yield_existing: bool = False) -> AsyncIterator[containers.LotEvent]:
+        """
+        Периодически запрашивает лоты и возвращает только изменения: добавленные, удаленные лоты
+        и лоты с измененным статусом. Ошибки запроса логируются, опрос продолжается.
+
+        :param interval: период опроса в секундах, по умолчанию WATCH_LOTS_INTERVAL
+        :param yield_existing: вернуть лоты первого запроса как добавленные
+        """
+        if interval is None:
+            interval = self.WATCH_LOTS_INTERVAL
+
+        snapshot = None
+        while True:
+            try:
+                lots = await self.get_lots()
+            except batch.BATCH_ERRORS as e:
+                # Включая ошибки соединения и таймауты: временный сбой сети не должен завершать наблюдение
+                LoggerWrap().get_logger().exception(str(e))
+            else:
+                if snapshot is None and not yield_existing:
+                    snapshot = lot_diff.create_snapshot(lots)
+                else:
+                    snapshot, events = lot_diff.diff(snapshot or {}, lots)
+                    for event in events:
+                        yield event
+            await asyncio.sleep(interval)
+
     async def get_rests(self) -> List[containers.Remain]:
         """
         Получить остатки тарифа
@@ -127,6 +321,7 @@ class Tele2Client(object):
             ApiException: если не удалось выполнить запрос
             IncorrectFormatResponse: если не удалось загрузить данные из ответа
         """
+        await self._ensure_token()
         return await self.api.get_rests()
 
     async def get_sellable_rests(self) -> List[containers.Remain]:
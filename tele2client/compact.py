@@ -0,0 +1,161 @@
+"""
+Компактное хранение большого количества лотов: значения хранятся по столбцам в массивах,
+а строки таблицы доступны через представления LotRow без копирования данных.
+"""
+from array import array
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+from tele2client import containers, converter
+from tele2client.enums import LotStatus, LotType, TrafficType
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+_STATUSES = tuple(LotStatus)
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+_TRAFFIC_TYPES = tuple(TrafficType)
+_TRAFFIC_TYPE_CODES = {traffic_type: code for code, traffic_type in enumerate(_TRAFFIC_TYPES)}
+_LOT_TYPES = tuple(converter.get_lot_type_by_traffic_type(traffic_type) for traffic_type in _TRAFFIC_TYPES)
+
+
+def _datetime2microseconds(dt: datetime) -> int:
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+def _microseconds2datetime(microseconds: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=microseconds)
+
+
+class LotRow(object):
+    """Представление строки LotTable, значения читаются из столбцов таблицы"""
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table: 'LotTable', index: int):
+        self.table = table
+        self.index = index
+
+    def __repr__(self):
+        return f'LotRow(id={self.id!r}, status={self.status}, cost={self.cost_amount})'
+
+    @property
+    def id(self) -> str:
+        return self.table.ids[self.index]
+
+    @property
+    def seller(self) -> containers.SellerLot:
+        emojis = list(self.table.emojis[self.index])
+        return containers.SellerLot(name=self.table.seller_names[self.index], emojis=emojis)
+
+    @property
+    def type(self) -> LotType:
+        return _LOT_TYPES[self.table.traffic_type_codes[self.index]]
+
+    @property
+    def traffic_type(self) -> TrafficType:
+        return _TRAFFIC_TYPES[self.table.traffic_type_codes[self.index]]
+
+    @property
+    def volume(self) -> containers.LotVolume:
+        return containers.LotVolume(count=self.table.volumes[self.index], unit=self.table.volume_units[self.index])
+
+    @property
+    def cost_amount(self) -> int:
+        return self.table.amounts[self.index]
+
+    @property
+    def cost(self) -> containers.LotCost:
+        return containers.LotCost(amount=self.table.amounts[self.index], currency=self.table.currencies[self.index])
+
+    @property
+    def status(self) -> LotStatus:
+        return _STATUSES[self.table.status_codes[self.index]]
+
+    @property
+    def create_dt(self) -> datetime:
+        return _microseconds2datetime(self.table.create_times[self.index])
+
+    def to_lot_info(self) -> containers.LotInfo:
+        return containers.LotInfo(
+            id=self.id,
+            seller=self.seller,
+            type=self.type,
+            traffic_type=self.traffic_type,
+            volume=self.volume,
+            cost=self.cost,
+            status=self.status,
+            create_dt=self.create_dt
+        )
+
+
+class LotTable(object):
+    """
+    Таблица лотов по столбцам. Числовые значения хранятся в array, повторяющиеся строки
+    (единицы измерения, валюта, эмодзи) разделяются между строками.
+    """
+
+    __slots__ = ('ids', 'seller_names', 'emojis', 'traffic_type_codes', 'volumes', 'volume_units',
+                 'amounts', 'currencies', 'status_codes', 'create_times', '_shared')
+
+    def __init__(self, lots_info: Iterable[containers.LotInfo] = ()):
+        self.ids: List[str] = []
+        self.seller_names: List[str] = []
+        self.emojis: List[Tuple[str, ...]] = []
+        self.traffic_type_codes = array('B')
+        self.volumes = array('q')
+        self.volume_units: List[str] = []
+        self.amounts = array('q')
+        self.currencies: List[str] = []
+        self.status_codes = array('B')
+        self.create_times = array('q')
+        self._shared = {}
+        self.extend(lots_info)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> LotRow:
+        if index < 0:
+            index += len(self.ids)
+        if not 0 <= index < len(self.ids):
+            raise IndexError('LotTable index out of range')
+        return LotRow(self, index)
+
+    def __iter__(self) -> Iterator[LotRow]:
+        return (LotRow(self, index) for index in range(len(self.ids)))
+
+    def _share(self, value):
+        return self._shared.setdefault(value, value)
+
+    def append(self, lot_info: containers.LotInfo):
+        self.ids.append(lot_info.id)
+        self.seller_names.append(lot_info.seller.name)
+        self.emojis.append(self._share(tuple(lot_info.seller.emojis)))
+        self.traffic_type_codes.append(_TRAFFIC_TYPE_CODES[lot_info.traffic_type])
+        self.volumes.append(lot_info.volume.count)
+        self.volume_units.append(self._share(lot_info.volume.unit))
+        self.amounts.append(lot_info.cost.amount)
+        self.currencies.append(self._share(lot_info.cost.currency))
+        self.status_codes.append(_STATUS_CODES[lot_info.status])
+        self.create_times.append(_datetime2microseconds(lot_info.create_dt))
+
+    def extend(self, lots_info: Iterable[containers.LotInfo]):
+        for lot_info in lots_info:
+            self.append(lot_info)
+
+    def to_lots_info(self) -> List[containers.LotInfo]:
+        return [row.to_lot_info() for row in self]
+
+    def select(self, predicate: Callable[[LotRow], bool]) -> List[LotRow]:
+        return [row for row in self if predicate(row)]
+
+    def select_by_status(self, status: LotStatus) -> List[LotRow]:
+        code = _STATUS_CODES[status]
+        return [LotRow(self, index) for index, status_code in enumerate(self.status_codes) if status_code == code]
+
+    def select_by_cost(self, min_amount: int = None, max_amount: int = None) -> List[LotRow]:
+        return [
+            LotRow(self, index) for index, amount in enumerate(self.amounts)
+            if (min_amount is None or amount >= min_amount) and (max_amount is None or amount <= max_amount)
+        ]
@@ -0,0 +1,28 @@
+from typing import Any, Dict, Mapping, NamedTuple, Optional
+
+
+class ConditionalEntry(NamedTuple):
+    """Валидаторы ответа (ETag, Last-Modified) и загруженные из него данные"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    value: Any
+
+
+def create_entry(headers: Mapping[str, str], value: Any) -> Optional[ConditionalEntry]:
+    etag = headers.get('ETag')
+    last_modified = headers.get('Last-Modified')
+    if etag is None and last_modified is None:
+        return None
+    return ConditionalEntry(etag=etag, last_modified=last_modified, value=value)
+
+
+def create_headers(entry: Optional[ConditionalEntry]) -> Dict:
+    if entry is None:
+        return {}
+
+    headers = {}
+    if entry.etag is not None:
+        headers['If-None-Match'] = entry.etag
+    if entry.last_modified is not None:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import NamedTuple, List
+from typing import Any, Mapping, NamedTuple, List, Optional
 
 from tele2client import enums
 
@@ -7,6 +7,19 @@ from tele2client import enums
 class AccessToken(NamedTuple):
     token: str = ''
     expired_dt: datetime = None
+    refresh_token: str = ''
+
+
+class Response(NamedTuple):
+    """Прочитанный ответ API; соединение уже возвращено в пул"""
+    status: int
+    reason: str
+    headers: Mapping[str, str]
+    body: bytes = b''
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
 
 
 class LotVolume(NamedTuple):
@@ -47,3 +60,62 @@ class Remain(NamedTuple):
     value: int
     unit: enums.Unit
     rollover: bool
+
+
+class BatchResult(NamedTuple):
+    """Результат выполнения одного элемента пакетной операции"""
+    item: Any
+    value: Any = None
+    error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class LotEvent(NamedTuple):
+    type: enums.LotEventType
+    lot_info: LotInfo
+    # Состояние лота до изменения статуса
+    previous: LotInfo = None
+
+
+class ScanResult(NamedTuple):
+    """Результат опроса одного номера"""
+    phone_number: str
+    balance: float = None
+    rests: List[Remain] = None
+    error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class LotPlan(NamedTuple):
+    """Минимальный набор изменений лотов"""
+    keep: List[LotInfo] = []
+    # Лоты с новыми ценой и эмодзи
+    edit: List[LotInfo] = []
+    create: List[Lot] = []
+    delete: List[str] = []
+
+    @property
+    def calls_count(self) -> int:
+        return len(self.edit) + len(self.create) + len(self.delete)
+
+
+class ReconcileResult(NamedTuple):
+    plan: LotPlan
+    deleted: List[BatchResult] = []
+    edited: List[BatchResult] = []
+    created: List[BatchResult] = []
+
+
+class CircuitTransition(NamedTuple):
+    endpoint: enums.Endpoint
+    # Номер телефона, если состояние отслеживается отдельно для каждого номера
+    phone_number: Optional[str]
+    previous: enums.CircuitState
+    state: enums.CircuitState
+    timestamp: float
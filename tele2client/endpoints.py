@@ -0,0 +1,85 @@
+"""
+Адреса методов API. URL разбираются один раз и передаются в aiohttp как yarl.URL,
+поэтому строки адресов не разбираются повторно при каждом запросе.
+"""
+import zlib
+from typing import Dict, NamedTuple, Optional, Sequence
+
+from yarl import URL
+
+DEFAULT_BASE_URL = 'https://my.tele2.ru'
+AUTH_PATH = ('auth', 'realms', 'tele2-b2c', 'protocol', 'openid-connect', 'token')
+
+
+class Route(NamedTuple):
+    """Хост API (например, зеркало или локальный тестовый сервер) и прокси для запросов к нему"""
+    base_url: str = DEFAULT_BASE_URL
+    proxy: str = None
+
+
+class SubscriberUrls(NamedTuple):
+    created_lots: URL
+    rests: URL
+    balance: URL
+    validation_number: URL
+    auth: URL
+    proxy: Optional[URL] = None
+
+    def lot(self, lot_id: str) -> URL:
+        return self.created_lots / lot_id
+
+
+class EndpointRegistry(object):
+    """
+    Реестр адресов для нескольких хостов. Номер всегда направляется на один и тот же хост
+    (по хэшу номера), что позволяет распределить номера между хостами или прокси.
+    """
+
+    routes: Sequence[Route]
+
+    def __init__(self, routes: Sequence[Route] = (Route(),)):
+        if not routes:
+            raise ValueError('Не задан ни один хост API')
+
+        self.routes = tuple(routes)
+        self._base_urls = [URL(route.base_url.rstrip('/')) for route in self.routes]
+        self._auth_urls = [self._join(base_url, *AUTH_PATH) for base_url in self._base_urls]
+        self._proxies = [None if route.proxy is None else URL(route.proxy) for route in self.routes]
+        self._urls: Dict[str, SubscriberUrls] = {}
+
+    @classmethod
+    def from_base_url(cls, base_url: str, proxy: str = None) -> 'EndpointRegistry':
+        return cls((Route(base_url, proxy),))
+
+    @staticmethod
+    def _join(url: URL, *segments: str) -> URL:
+        for segment in segments:
+            url = url / segment
+        return url
+
+    def _get_route_index(self, phone_number: str) -> int:
+        if len(self.routes) == 1:
+            return 0
+        return zlib.crc32(phone_number.encode()) % len(self.routes)
+
+    def get_urls(self, phone_number: str) -> SubscriberUrls:
+        urls = self._urls.get(phone_number)
+        if urls is not None:
+            return urls
+
+        index = self._get_route_index(phone_number)
+        api_url = self._base_urls[index] / 'api'
+        subscriber_url = self._join(api_url, 'subscribers', phone_number)
+        urls = SubscriberUrls(
+            created_lots=self._join(subscriber_url, 'exchange', 'lots', 'created'),
+            rests=subscriber_url / 'rests',
+            balance=subscriber_url / 'balance',
+            validation_number=self._join(api_url, 'validation', 'number', phone_number),
+            auth=self._auth_urls[index],
+            proxy=self._proxies[index]
+        )
+        self._urls[phone_number] = urls
+        return urls
+
+
+DEFAULT_REGISTRY = EndpointRegistry()
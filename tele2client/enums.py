@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class TrafficType(Enum):
@@ -39,3 +39,31 @@ class Emoji(Enum):
     COOL = 'cool'
     DEVIL = 'devil'
     RICH = 'rich'
+
+
+class Endpoint(Enum):
+    TOKEN = 'token'
+    VALIDATION_NUMBER = 'validation_number'
+    BALANCE = 'balance'
+    RESTS = 'rests'
+    LOTS = 'lots'
+    LOT = 'lot'
+
+
+class LotEventType(Enum):
+    ADDED = 'added'
+    REMOVED = 'removed'
+    STATUS_CHANGED = 'status_changed'
+
+
+class CircuitState(Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class Priority(IntEnum):
+    """Приоритет запроса: меньшее значение обслуживается раньше"""
+    INTERACTIVE = 0
+    POLLING = 1
+    BACKGROUND = 2
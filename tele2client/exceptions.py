@@ -1,6 +1,6 @@
-from typing import Dict
+from typing import Dict, NamedTuple
 
-from aiohttp import ClientResponse
+from tele2client import containers
 
 
 class BaseTele2ClientException(Exception):
@@ -17,15 +17,28 @@ class IncorrectPhoneNumber(InputDataException):
     pass
 
 
+class ResponseInfo(NamedTuple):
+    """Данные ответа, сохраняемые в исключении: статус, причина и начало тела ответа"""
+    status: int
+    reason: str
+    content: bytes
+
+
 class ApiException(BaseTele2ClientException):
     """Неудачное выполнение API-метода"""
+    CONTENT_LIMIT = 1024
+
     request_json: Dict
-    response: ClientResponse
+    response: ResponseInfo
 
-    def __init__(self, message: str, response: ClientResponse, request_json: Dict = None):
+    def __init__(self, message: str, response: containers.Response, request_json: Dict = None):
         super().__init__(message)
         self.request_json = request_json
-        self.response = response
+        self.response = ResponseInfo(
+            status=response.status,
+            reason=response.reason,
+            content=bytes(response.body[:self.CONTENT_LIMIT])
+        )
 
     def __str__(self):
         return f'{super().__str__()}\nrequest_json={self.request_json}\nresponse: {self._response_to_str()}'
@@ -47,3 +60,17 @@ class TimeExpired(BaseTele2ClientException):
 class FailedConversion(BaseTele2ClientException):
     """Не удалось преоразовать данные"""
     pass
+
+
+class DeadlineExceeded(TimeExpired):
+    """Истек срок выполнения запроса (tele2client.timeouts.deadline)"""
+    pass
+
+
+class CircuitOpen(BaseTele2ClientException):
+    """Запрос не выполнен: метод API временно отключен после серии ошибок"""
+    retry_after: float
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,28 @@
+"""
+Кодирование и декодирование JSON. Если установлен orjson, используется он, иначе стандартный json.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Принимает тело ответа в байтах, чтобы не декодировать его в строку перед разбором
+
+    :raises:
+        ValueError: если данные не являются корректным JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
@@ -0,0 +1,32 @@
+from typing import Dict, Iterable, List, Tuple
+
+from tele2client import containers
+from tele2client.enums import LotEventType
+
+LotsSnapshot = Dict[str, containers.LotInfo]
+
+
+def create_snapshot(lots_info: Iterable[containers.LotInfo]) -> LotsSnapshot:
+    return {lot_info.id: lot_info for lot_info in lots_info}
+
+
+def diff(snapshot: LotsSnapshot,
+         lots_info: Iterable[containers.LotInfo]) -> Tuple[LotsSnapshot, List[containers.LotEvent]]:
+    """
+    Сравнивает новый список лотов со снимком
+
+    :return: новый снимок и события: добавленные, удаленные лоты и лоты с измененным статусом
+    """
+    new_snapshot = create_snapshot(lots_info)
+    events = []
+    for lot_id, lot_info in new_snapshot.items():
+        previous = snapshot.get(lot_id)
+        if previous is None:
+            events.append(containers.LotEvent(type=LotEventType.ADDED, lot_info=lot_info))
+        elif previous.status != lot_info.status:
+            events.append(containers.LotEvent(type=LotEventType.STATUS_CHANGED, lot_info=lot_info, previous=previous))
+
+    for lot_id, lot_info in snapshot.items():
+        if lot_id not in new_snapshot:
+            events.append(containers.LotEvent(type=LotEventType.REMOVED, lot_info=lot_info))
+    return new_snapshot, events
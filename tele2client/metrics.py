@@ -0,0 +1,171 @@
+"""
+Метрики запросов к API. ApiTele2 и TraceConfig сессии передают значения в MetricsSink;
+InMemoryMetrics хранит их в памяти и выводит в текстовом формате Prometheus.
+"""
+import bisect
+from types import SimpleNamespace
+from typing import Dict, List, Sequence, Tuple
+
+from aiohttp import TraceConfig
+
+from tele2client import time_utils
+
+REQUEST_DURATION = 'tele2_request_duration_seconds'
+RESPONSES = 'tele2_responses_total'
+REQUEST_ERRORS = 'tele2_request_errors_total'
+RETRIES = 'tele2_retries_total'
+SENT_BYTES = 'tele2_sent_bytes_total'
+RECEIVED_BYTES = 'tele2_received_bytes_total'
+CONNECTIONS = 'tele2_connections_total'
+PARSE_DURATION = 'tele2_parse_duration_seconds'
+CIRCUIT_TRANSITIONS = 'tele2_circuit_transitions_total'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Dict[str, str]
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _create_key(name: str, labels: Labels = None) -> MetricKey:
+    return name, tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+
+class MetricsSink(object):
+    """Интерфейс получателя метрик"""
+
+    def increment(self, name: str, labels: Labels = None, value: float = 1):
+        raise NotImplementedError
+
+    def observe(self, name: str, value: float, labels: Labels = None):
+        raise NotImplementedError
+
+
+class Histogram(object):
+    buckets: Sequence[float]
+    counts: List[int]
+    sum: float
+    count: int
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[int]:
+        result = []
+        total = 0
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class InMemoryMetrics(MetricsSink):
+    buckets: Sequence[float]
+    counters: Dict[MetricKey, float]
+    histograms: Dict[MetricKey, Histogram]
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name: str, labels: Labels = None, value: float = 1):
+        key = _create_key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = None):
+        key = _create_key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = Histogram(self.buckets)
+            self.histograms[key] = histogram
+        histogram.observe(value)
+
+    def get_counter(self, name: str, **labels) -> float:
+        return self.counters.get(_create_key(name, labels), 0)
+
+    def get_histogram(self, name: str, **labels) -> Histogram:
+        return self.histograms.get(_create_key(name, labels))
+
+    def render(self) -> str:
+        lines = []
+        for (name, labels), value in sorted(self.counters.items()):
+            lines.append(f'{name}{_format_labels(labels)} {value}')
+
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            for bound, count in zip(histogram.buckets, histogram.cumulative_counts()):
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {count}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {histogram.count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {histogram.sum}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def create_request_context(endpoint: str) -> SimpleNamespace:
+    """
+    Контекст передается в session.request(trace_request_ctx=...), чтобы метрики TraceConfig
+    содержали метку метода API. waiting_for_connection и limited_by_deadline используются
+    автоматическим выключателем, чтобы отличать ошибки метода API от ограничений самого клиента.
+    """
+    return SimpleNamespace(endpoint=endpoint, waiting_for_connection=False, limited_by_deadline=False)
+
+
+def _get_labels(trace_config_ctx: SimpleNamespace) -> Labels:
+    request_ctx = trace_config_ctx.trace_request_ctx
+    return {'endpoint': getattr(request_ctx, 'endpoint', 'unknown')}
+
+
+def create_trace_config(sink: MetricsSink) -> TraceConfig:
+    """
+    Длительность и статусы запросов, объем переданных данных, новые и повторно используемые соединения
+    """
+
+    async def on_request_start(session, trace_config_ctx, params):
+        trace_config_ctx.start = time_utils.monotonic_timestamp()
+
+    async def on_request_end(session, trace_config_ctx, params):
+        labels = _get_labels(trace_config_ctx)
+        sink.observe(REQUEST_DURATION, time_utils.monotonic_timestamp() - trace_config_ctx.start, labels)
+        sink.increment(RESPONSES, dict(labels, status=str(params.response.status)))
+
+    async def on_request_exception(session, trace_config_ctx, params):
+        labels = _get_labels(trace_config_ctx)
+        sink.observe(REQUEST_DURATION, time_utils.monotonic_timestamp() - trace_config_ctx.start, labels)
+        sink.increment(REQUEST_ERRORS, dict(labels, error=type(params.exception).__name__))
+
+    async def on_request_chunk_sent(session, trace_config_ctx, params):
+        sink.increment(SENT_BYTES, _get_labels(trace_config_ctx), len(params.chunk))
+
+    async def on_response_chunk_received(session, trace_config_ctx, params):
+        sink.increment(RECEIVED_BYTES, _get_labels(trace_config_ctx), len(params.chunk))
+
+    async def on_connection_create_end(session, trace_config_ctx, params):
+        sink.increment(CONNECTIONS, {'type': 'new'})
+
+    async def on_connection_reuseconn(session, trace_config_ctx, params):
+        sink.increment(CONNECTIONS, {'type': 'reused'})
+
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    trace_config.on_request_chunk_sent.append(on_request_chunk_sent)
+    trace_config.on_response_chunk_received.append(on_response_chunk_received)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
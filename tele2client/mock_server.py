@@ -0,0 +1,243 @@
+"""
+Локальный сервер, имитирующий API Tele2, для нагрузочного тестирования без обращения к my.tele2.ru.
+Поддерживает задержку ответов, случайные ошибки 500 и ответы 429 с Retry-After.
+
+    python -m tele2client.mock_server --port 8080 --latency 0.05 --error-rate 0.01
+
+Клиент подключается к серверу через ApiSettings(endpoints=EndpointRegistry.from_base_url(server.url)).
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import socket
+from datetime import datetime
+from http import HTTPStatus
+from typing import Dict, NamedTuple
+
+from aiohttp import web
+
+from tele2client import containers, time_utils
+
+SUBSCRIBER_PATH = '/api/subscribers/{phone_number}'
+
+
+class MockSettings(NamedTuple):
+    # Задержка ответа в секундах и ее случайный разброс
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Доли ответов 500 и 429
+    error_rate: float = 0.0
+    too_many_requests_rate: float = 0.0
+    retry_after: int = 1
+    sms_code: str = '0000'
+    token_lifetime: int = 3600
+    check_auth: bool = True
+    balance: float = 100.0
+
+
+class MockTele2Server(object):
+    settings: MockSettings
+    host: str
+    port: int
+    request_count: int
+    balances: Dict[str, float]
+    lots: Dict[str, Dict[str, Dict]]
+
+    def __init__(self, settings: MockSettings = None, host: str = '127.0.0.1', port: int = 0):
+        self.settings = MockSettings() if settings is None else settings
+        self.host = host
+        self.port = port
+        self.request_count = 0
+        self.balances = {}
+        self.lots = {}
+        self._tokens: Dict[str, str] = {}
+        self._refresh_tokens: Dict[str, str] = {}
+        self._lots_versions: Dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._faults_middleware, self._auth_middleware])
+        app.router.add_post('/auth/realms/tele2-b2c/protocol/openid-connect/token', self._token)
+        app.router.add_post('/api/validation/number/{phone_number}', self._validation_number)
+        app.router.add_get(f'{SUBSCRIBER_PATH}/balance', self._balance)
+        app.router.add_get(f'{SUBSCRIBER_PATH}/rests', self._rests)
+        app.router.add_get(f'{SUBSCRIBER_PATH}/exchange/lots/created', self._get_lots)
+        app.router.add_put(f'{SUBSCRIBER_PATH}/exchange/lots/created', self._create_lot)
+        app.router.add_put(f'{SUBSCRIBER_PATH}/exchange/lots/created/{{lot_id}}', self._edit_lot)
+        app.router.add_delete(f'{SUBSCRIBER_PATH}/exchange/lots/created/{{lot_id}}', self._delete_lot)
+        return app
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        await web.SockSite(self._runner, sock).start()
+        return self.url
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def issue_token(self, phone_number: str) -> containers.AccessToken:
+        """
+        Токен для номера без запроса смс-кода
+        """
+        token = f'token-{phone_number}-{next(self._ids)}'
+        refresh_token = f'refresh-{phone_number}-{next(self._ids)}'
+        self._tokens[token] = phone_number
+        self._refresh_tokens[refresh_token] = phone_number
+        expired_dt = time_utils.timestamp2datetime(time_utils.future_timestamp(self.settings.token_lifetime))
+        return containers.AccessToken(token=token, expired_dt=expired_dt, refresh_token=refresh_token)
+
+    def _token_response(self, phone_number: str) -> web.Response:
+        access_token = self.issue_token(phone_number)
+        return web.json_response({
+            'access_token': access_token.token,
+            'expires_in': self.settings.token_lifetime,
+            'refresh_token': access_token.refresh_token
+        })
+
+    @web.middleware
+    async def _faults_middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        self.request_count += 1
+        settings = self.settings
+        if settings.latency or settings.latency_jitter:
+            await asyncio.sleep(settings.latency + random.uniform(0, settings.latency_jitter))
+
+        if settings.too_many_requests_rate and random.random() < settings.too_many_requests_rate:
+            return web.json_response(
+                {'error': 'too many requests'},
+                status=HTTPStatus.TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(settings.retry_after)}
+            )
+        if settings.error_rate and random.random() < settings.error_rate:
+            return web.json_response({'error': 'internal error'}, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+        return await handler(request)
+
+    @web.middleware
+    async def _auth_middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        phone_number = request.match_info.get('phone_number')
+        if self.settings.check_auth and request.path.startswith('/api/subscribers/'):
+            token = request.headers.get('Authorization', '')[len('Bearer '):]
+            if self._tokens.get(token) != phone_number:
+                return web.json_response({'error': 'unauthorized'}, status=HTTPStatus.UNAUTHORIZED)
+        return await handler(request)
+
+    async def _token(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        if data.get('grant_type') == 'refresh_token':
+            phone_number = self._refresh_tokens.pop(data.get('refresh_token'), None)
+            if phone_number is not None:
+                return self._token_response(phone_number)
+        elif data.get('password') == self.settings.sms_code:
+            return self._token_response(data.get('username'))
+        return web.json_response({'error': 'invalid_grant'}, status=HTTPStatus.UNAUTHORIZED)
+
+    async def _validation_number(self, request: web.Request) -> web.Response:
+        return web.json_response({'meta': {'status': 'OK'}})
+
+    async def _balance(self, request: web.Request) -> web.Response:
+        balance = self.balances.get(request.match_info['phone_number'], self.settings.balance)
+        return web.json_response({'data': {'value': balance}})
+
+    async def _rests(self, request: web.Request) -> web.Response:
+        return web.json_response({'data': {'rests': [
+            {'type': 'tariff', 'rollover': False, 'status': 'active', 'remain': 10240, 'uom': 'mb'},
+            {'type': 'tariff', 'rollover': False, 'status': 'active', 'remain': 500, 'uom': 'min'},
+            {'type': 'tariff', 'rollover': True, 'status': 'active', 'remain': 1024, 'uom': 'mb'},
+        ]}})
+
+    def _get_subscriber_lots(self, phone_number: str) -> Dict[str, Dict]:
+        return self.lots.setdefault(phone_number, {})
+
+    def _lots_changed(self, phone_number: str):
+        self._lots_versions[phone_number] = self._lots_versions.get(phone_number, 0) + 1
+
+    async def _get_lots(self, request: web.Request) -> web.Response:
+        phone_number = request.match_info['phone_number']
+        etag = f'"{self._lots_versions.get(phone_number, 0)}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag})
+        lots = list(self._get_subscriber_lots(phone_number).values())
+        return web.json_response({'data': lots}, headers={'ETag': etag})
+
+    async def _create_lot(self, request: web.Request) -> web.Response:
+        phone_number = request.match_info['phone_number']
+        data = await request.json()
+        lot = {
+            'id': str(next(self._ids)),
+            'seller': {'name': None, 'emojis': []},
+            'trafficType': data['trafficType'],
+            'volume': data['volume'],
+            'cost': data['cost'],
+            'status': 'active',
+            'creationDate': datetime.now().isoformat(timespec='seconds')
+        }
+        self._get_subscriber_lots(phone_number)[lot['id']] = lot
+        self._lots_changed(phone_number)
+        return web.json_response({'data': lot})
+
+    async def _edit_lot(self, request: web.Request) -> web.Response:
+        phone_number = request.match_info['phone_number']
+        lot = self._get_subscriber_lots(phone_number).get(request.match_info['lot_id'])
+        if lot is None:
+            return web.json_response({'error': 'not found'}, status=HTTPStatus.NOT_FOUND)
+
+        data = await request.json()
+        lot['cost'] = data['cost']
+        lot['seller'] = dict(lot['seller'], emojis=data['emojis'])
+        self._lots_changed(phone_number)
+        return web.json_response({'data': lot})
+
+    async def _delete_lot(self, request: web.Request) -> web.Response:
+        phone_number = request.match_info['phone_number']
+        lot = self._get_subscriber_lots(phone_number).get(request.match_info['lot_id'])
+        if lot is None:
+            return web.json_response({'error': 'not found'}, status=HTTPStatus.NOT_FOUND)
+
+        lot['status'] = 'revoked'
+        self._lots_changed(phone_number)
+        return web.json_response({'data': None})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Локальный сервер, имитирующий API Tele2')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--too-many-requests-rate', type=float, default=0.0)
+    parser.add_argument('--no-auth', action='store_true', help='не проверять токен доступа')
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        too_many_requests_rate=args.too_many_requests_rate,
+        check_auth=not args.no_auth
+    )
+    server = MockTele2Server(settings, args.host, args.port)
+    web.run_app(server.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+from typing import Dict, Iterator, List, Mapping
+
+from aiohttp import ClientSession
+
+from tele2client import batch, containers
+from tele2client.api import DEFAULT_CONNECTIONS_LIMIT, ApiSettings, create_connector, create_session
+from tele2client.client import SmsCodeGetterType, Tele2Client
+from tele2client.rate_limiter import TokenBucket
+from tele2client.token_store import BaseTokenStore
+
+
+class Tele2ClientPool(object):
+    """
+    Набор клиентов для нескольких номеров, использующих одну сессию и один пул соединений.
+    Количество открытых соединений ограничено connections_limit и не зависит от количества номеров.
+    """
+
+    # Допустимое количество запросов к методам авторизации в секунду при подключении номеров
+    AUTH_RATE = 5
+
+    session: ClientSession
+    settings: ApiSettings
+    token_store: BaseTokenStore
+    clients: Dict[str, Tele2Client]
+
+    def __init__(self, connections_limit: int = DEFAULT_CONNECTIONS_LIMIT, connections_limit_per_host: int = 0,
+                 settings: ApiSettings = None, token_store: BaseTokenStore = None):
+        """
+        :param settings: общие для всех клиентов компоненты API (например, RateLimiter с общим лимитом)
+        :param token_store: хранилище токенов; пул не закрывает его, но сохраняет изменения при закрытии
+        """
+        connector = create_connector(connections_limit, connections_limit_per_host)
+        self.session = create_session(connector, metrics_sink=None if settings is None else settings.metrics_sink)
+        self.settings = settings
+        self.token_store = token_store
+        self.clients = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def __contains__(self, phone_number: str) -> bool:
+        return phone_number in self.clients
+
+    def __iter__(self) -> Iterator[Tele2Client]:
+        return iter(list(self.clients.values()))
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    async def close(self):
+        self.clients.clear()
+        if self.token_store is not None:
+            await self.token_store.flush()
+        await self.session.close()
+
+    def get_client(self, phone_number: str) -> Tele2Client:
+        client = self.clients.get(phone_number)
+        if client is None:
+            client = Tele2Client(phone_number, self.session, self.settings, self.token_store)
+            self.clients[phone_number] = client
+        return client
+
+    def remove_client(self, phone_number: str) -> bool:
+        return self.clients.pop(phone_number, None) is not None
+
+    async def load_tokens(self) -> List[str]:
+        """
+        Создает клиентов для номеров с действующими токенами из хранилища
+
+        :return: номера, для которых не нужна повторная авторизация
+        """
+        if self.token_store is None:
+            return []
+
+        tokens = await self.token_store.load_valid()
+        for phone_number, access_token in tokens.items():
+            client = self.get_client(phone_number)
+            # Токен уже есть в хранилище, поэтому он устанавливается без повторного сохранения
+            client.api.access_token = access_token
+        return list(tokens)
+
+    async def onboard(self, sms_code_getters: Mapping[str, SmsCodeGetterType],
+                      concurrency: int = batch.DEFAULT_CONCURRENCY,
+                      limiter: TokenBucket = None) -> List[containers.BatchResult]:
+        """
+        Авторизует номера параллельно. Запросы смс-кодов и токенов всех номеров проходят через общий limiter,
+        чтобы не превысить ограничения метода получения токена.
+
+        :param sms_code_getters: номер телефона -> функция получения смс-кода для него
+        :return: BatchResult для каждого номера, value - результат Tele2Client.auth
+        """
+        if limiter is None:
+            limiter = TokenBucket(self.AUTH_RATE)
+
+        async def auth(phone_number: str) -> bool:
+            return await self.get_client(phone_number).auth(sms_code_getters[phone_number], limiter)
+
+        return await batch.run(auth, sms_code_getters, concurrency)
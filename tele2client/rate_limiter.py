@@ -0,0 +1,96 @@
+import asyncio
+from typing import Dict, Optional
+
+from tele2client import time_utils
+
+
+class TokenBucket(object):
+    """
+    Ограничитель скорости по алгоритму "token bucket":
+    rate токенов в секунду, не более capacity токенов подряд.
+    """
+
+    rate: float
+    capacity: float
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = max(rate, 1.0) if capacity is None else capacity
+        self._tokens = self.capacity
+        self._updated = time_utils.monotonic_timestamp()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _get_delay(self) -> float:
+        now = time_utils.monotonic_timestamp()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self):
+        # Блокировка сохраняет порядок ожидающих: токены выдаются в порядке очереди
+        async with self._lock:
+            delay = self._get_delay()
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self._get_delay()
+
+    def block(self, seconds: float):
+        """
+        Запрещает выдачу токенов на seconds секунд (например, после ответа 429 с Retry-After)
+        """
+        self._blocked_until = max(self._blocked_until, time_utils.monotonic_timestamp() + seconds)
+
+
+class RateLimiter(object):
+    """
+    Общий лимит запросов для всех номеров и отдельный лимит для каждого номера
+    """
+
+    global_bucket: Optional[TokenBucket]
+    subscriber_rate: Optional[float]
+    subscriber_capacity: Optional[float]
+
+    def __init__(self, global_rate: float = None, global_capacity: float = None,
+                 subscriber_rate: float = None, subscriber_capacity: float = None):
+        self.global_bucket = None if global_rate is None else TokenBucket(global_rate, global_capacity)
+        self.subscriber_rate = subscriber_rate
+        self.subscriber_capacity = subscriber_capacity
+        self._subscriber_buckets: Dict[str, TokenBucket] = {}
+
+    def _get_subscriber_bucket(self, phone_number: str) -> Optional[TokenBucket]:
+        if self.subscriber_rate is None:
+            return None
+
+        bucket = self._subscriber_buckets.get(phone_number)
+        if bucket is None:
+            bucket = TokenBucket(self.subscriber_rate, self.subscriber_capacity)
+            self._subscriber_buckets[phone_number] = bucket
+        return bucket
+
+    async def acquire(self, phone_number: str):
+        subscriber_bucket = self._get_subscriber_bucket(phone_number)
+        if subscriber_bucket is not None:
+            await subscriber_bucket.acquire()
+        if self.global_bucket is not None:
+            await self.global_bucket.acquire()
+
+    def block(self, phone_number: str, seconds: float):
+        """
+        Ответ 429 приостанавливает и запросы номера, и общий лимит: остальные номера тоже не должны
+        отправлять запросы раньше Retry-After
+        """
+        subscriber_bucket = self._get_subscriber_bucket(phone_number)
+        if subscriber_bucket is not None:
+            subscriber_bucket.block(seconds)
+        if self.global_bucket is not None:
+            self.global_bucket.block(seconds)
@@ -0,0 +1,93 @@
+"""
+Приведение лотов номера к желаемому состоянию минимальным количеством вызовов API:
+лоты с нужным объемом и ценой сохраняются, у лотов с нужным объемом меняется цена (edit_lot),
+создаются и удаляются только недостающие и лишние лоты.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from tele2client import batch, containers
+from tele2client.enums import LotStatus, LotType
+
+VolumeKey = Tuple[LotType, int, str]
+
+
+def _get_unit_value(unit) -> str:
+    # В LotInfo единица измерения хранится строкой из ответа API, в Lot - значением Unit
+    return getattr(unit, 'value', unit)
+
+
+def _get_lot_key(lot: containers.Lot) -> VolumeKey:
+    return lot.type, lot.volume.count, _get_unit_value(lot.volume.unit)
+
+
+def _get_lot_info_key(lot_info: containers.LotInfo) -> VolumeKey:
+    return lot_info.type, lot_info.volume.count, _get_unit_value(lot_info.volume.unit)
+
+
+def _is_same(lot: containers.Lot, lot_info: containers.LotInfo, emojis: List[str] = None) -> bool:
+    return lot.cost == lot_info.cost.amount and (emojis is None or list(emojis) == list(lot_info.seller.emojis))
+
+
+def _change(lot_info: containers.LotInfo, lot: containers.Lot, emojis: List[str] = None) -> containers.LotInfo:
+    seller = lot_info.seller if emojis is None else lot_info.seller._replace(emojis=list(emojis))
+    return lot_info._replace(seller=seller, cost=lot_info.cost._replace(amount=lot.cost))
+
+
+def create_plan(desired: Iterable[containers.Lot], current: Iterable[containers.LotInfo],
+                emojis: List[str] = None) -> containers.LotPlan:
+    """
+    :param desired: желаемые лоты
+    :param current: текущие лоты (учитываются только активные)
+    :param emojis: желаемые эмодзи для всех лотов; если не заданы, эмодзи не сравниваются и не меняются
+    """
+    desired_by_key: Dict[VolumeKey, List[containers.Lot]] = defaultdict(list)
+    for lot in desired:
+        desired_by_key[_get_lot_key(lot)].append(lot)
+
+    current_by_key: Dict[VolumeKey, List[containers.LotInfo]] = defaultdict(list)
+    for lot_info in current:
+        if lot_info.status == LotStatus.ACTIVE:
+            current_by_key[_get_lot_info_key(lot_info)].append(lot_info)
+
+    plan = containers.LotPlan(keep=[], edit=[], create=[], delete=[])
+    for key in set(desired_by_key) | set(current_by_key):
+        lots = list(desired_by_key.get(key, ()))
+        lots_info = list(current_by_key.get(key, ()))
+
+        # Сначала сохраняются лоты, которые уже совпадают с желаемыми
+        for lot in list(lots):
+            for lot_info in lots_info:
+                if _is_same(lot, lot_info, emojis):
+                    plan.keep.append(lot_info)
+                    lots.remove(lot)
+                    lots_info.remove(lot_info)
+                    break
+
+        # Оставшиеся пары с одинаковым объемом отличаются только ценой или эмодзи
+        lots.sort(key=lambda item: item.cost)
+        lots_info.sort(key=lambda item: item.cost.amount)
+        for lot, lot_info in zip(lots, lots_info):
+            plan.edit.append(_change(lot_info, lot, emojis))
+
+        paired = min(len(lots), len(lots_info))
+        plan.create.extend(lots[paired:])
+        plan.delete.extend(lot_info.id for lot_info in lots_info[paired:])
+    return plan
+
+
+async def apply_plan(api, plan: containers.LotPlan,
+                     concurrency: int = batch.DEFAULT_CONCURRENCY) -> containers.ReconcileResult:
+    """
+    Удаление выполняется первым, чтобы освободить остатки для новых лотов,
+    затем редактирование и создание выполняются параллельно.
+
+    :param api: ApiTele2 или Tele2Client
+    """
+    deleted = await api.delete_lots(plan.delete, concurrency)
+    edited, created = await asyncio.gather(
+        api.edit_lots(plan.edit, concurrency),
+        api.create_lots(plan.create, concurrency)
+    )
+    return containers.ReconcileResult(plan=plan, deleted=deleted, edited=edited, created=created)
@@ -3,9 +3,8 @@ from typing import Dict
 from tele2client import containers, converter
 
 
-def create_headers(access_token: str = '') -> Dict:
+def create_headers() -> Dict:
     return {
-        'Authorization': f'Bearer {access_token}',
         'Connection': 'keep-alive',
         'X-API-Version': '1',
         'User-Agent': 'okhttp/4.2.0',
@@ -13,6 +12,10 @@ def create_headers(access_token: str = '') -> Dict:
     }
 
 
+def create_auth_headers(access_token: str = '') -> Dict:
+    return {'Authorization': f'Bearer {access_token}'}
+
+
 def create_for_edit_lot(lot_info: containers.LotInfo) -> Dict:
     return {
         'showSellerName': True,
@@ -31,6 +34,14 @@ def create_for_access(phone_number: str, sms_code: str) -> Dict:
     }
 
 
+def create_for_refresh_access(refresh_token: str) -> Dict:
+    return {
+        'client_id': 'digital-suite-web-app',
+        'grant_type': 'refresh_token',
+        'refresh_token': refresh_token
+    }
+
+
 def create_for_request_sms() -> Dict:
     return {'sender': 'Tele2'}
 
@@ -1,16 +1,53 @@
-from typing import Dict, Iterable, Tuple, List, NoReturn
+from datetime import datetime
+from enum import Enum
+from typing import Dict, FrozenSet, Iterable, List, NoReturn, Type
 
 from dateutil import parser
 
 from tele2client import containers, converter, exceptions, time_utils
 from tele2client.enums import LotStatus, RemainType, RemainStatus, TrafficType, Unit
 
+_ACCESS_TOKEN_KEYS = frozenset(('access_token', 'expires_in'))
+_BALANCE_KEYS = frozenset(('value',))
+_SELLER_LOT_KEYS = frozenset(('name', 'emojis'))
+_LOT_VOLUME_KEYS = frozenset(('value', 'uom'))
+_LOT_COST_KEYS = frozenset(('amount', 'currency'))
+_LOT_INFO_KEYS = frozenset(('id', 'seller', 'trafficType', 'cost', 'status', 'creationDate'))
+_REMAIN_KEYS = frozenset(('type', 'rollover', 'status', 'remain', 'uom'))
+_RESTS_KEYS = frozenset(('rests',))
 
-def _has_keys(sequence: Iterable, keys: Tuple[str, ...]) -> bool:
-    for key in keys:
-        if key not in sequence:
-            return False
-    return True
+_ENUM_MEMBERS = {
+    enum_type: {member.value: member for member in enum_type}
+    for enum_type in (LotStatus, RemainType, RemainStatus, TrafficType, Unit)
+}
+_LOT_TYPES = {traffic_type: converter.get_lot_type_by_traffic_type(traffic_type) for traffic_type in TrafficType}
+
+
+def _has_keys(sequence: Iterable, keys: FrozenSet[str]) -> bool:
+    if isinstance(sequence, dict):
+        return sequence.keys() >= keys
+    return all(key in sequence for key in keys)
+
+
+def _get_enum(enum_type: Type[Enum], value) -> Enum:
+    try:
+        return _ENUM_MEMBERS[enum_type][value]
+    except (KeyError, TypeError):
+        # Исходное поведение Enum: ValueError для неизвестного значения
+        return enum_type(value)
+
+
+def _parse_datetime(value: str) -> datetime:
+    """
+    Дата в ответах API приходит в формате ISO-8601, который разбирается без dateutil.
+    Для остальных форматов используется dateutil. Часовой пояс отбрасывается.
+    """
+    try:
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except (AttributeError, ValueError):
+        return parser.parse(value, ignoretz=True)
 
 
 def _assert_has_data(data: Dict) -> NoReturn:
@@ -22,13 +59,13 @@ def _assert_has_data(data: Dict) -> NoReturn:
         raise exceptions.IncorrectFormatResponse('Не найден параметр: data', data)
 
 
-def _assert_keys(data: Dict, keys: Tuple[str, ...]) -> NoReturn:
+def _assert_keys(data: Dict, keys: FrozenSet[str]) -> NoReturn:
     """
     :raises:
         IncorrectFormatResponse: если один из ключей отсутствует
     """
     if not _has_keys(data, keys):
-        raise exceptions.IncorrectFormatResponse(f'Не найдены параметры: {keys}', data)
+        raise exceptions.IncorrectFormatResponse(f'Не найдены параметры: {tuple(sorted(keys))}', data)
 
 
 def get_data(response: Dict) -> List[Dict] or Dict:
@@ -45,11 +82,12 @@ def load_access_token(data: Dict) -> containers.AccessToken:
     :raises:
         IncorrectFormatResponse: если отсутствуют параметры: 'access_token' и 'expires_in'
     """
-    _assert_keys(data, ('access_token', 'expires_in'))
+    _assert_keys(data, _ACCESS_TOKEN_KEYS)
 
     return containers.AccessToken(
         token=data['access_token'],
-        expired_dt=time_utils.timestamp2datetime(time_utils.future_timestamp(data['expires_in']))
+        expired_dt=time_utils.timestamp2datetime(time_utils.future_timestamp(data['expires_in'])),
+        refresh_token=data.get('refresh_token', '')
     )
 
 
@@ -58,7 +96,7 @@ def load_balance(data: Dict) -> float:
     :raises:
         IncorrectFormatResponse: если отсутствует параметр 'value'
     """
-    _assert_keys(data, ('value',))
+    _assert_keys(data, _BALANCE_KEYS)
     return data['value']
 
 
@@ -67,7 +105,7 @@ def load_seller_lot(data: Dict) -> containers.SellerLot:
     :raises:
         IncorrectFormatResponse: если отсутствуют параметры: 'name' и 'emojis'
     """
-    _assert_keys(data, ('name', 'emojis'))
+    _assert_keys(data, _SELLER_LOT_KEYS)
     return containers.SellerLot(name=data['name'], emojis=data['emojis'])
 
 
@@ -76,7 +114,7 @@ def load_lot_volume(data: Dict) -> containers.LotVolume:
     :raises:
         IncorrectFormatResponse: если отсутствуют параметры: 'value' и 'uom'
     """
-    _assert_keys(data, ('value', 'uom'))
+    _assert_keys(data, _LOT_VOLUME_KEYS)
     return containers.LotVolume(count=data['value'], unit=data['uom'])
 
 
@@ -85,7 +123,7 @@ def load_lot_cost(data: Dict) -> containers.LotCost:
     :raises:
         IncorrectFormatResponse: если отсутствуют параметры: 'amount' и 'currency'
     """
-    _assert_keys(data, ('amount', 'currency'))
+    _assert_keys(data, _LOT_COST_KEYS)
     return containers.LotCost(amount=data['amount'], currency=data['currency'])
 
 
@@ -96,17 +134,17 @@ def load_lot_info(data: Dict) -> containers.LotInfo:
         FailedConversion: если не удалось преобразовать данные
     """
 
-    _assert_keys(data, ('id', 'seller', 'trafficType', 'cost', 'status', 'creationDate'))
-    traffic_type = TrafficType(data['trafficType'])
+    _assert_keys(data, _LOT_INFO_KEYS)
+    traffic_type = _get_enum(TrafficType, data['trafficType'])
     return containers.LotInfo(
         id=data['id'],
         seller=load_seller_lot(data['seller']),
-        type=converter.get_lot_type_by_traffic_type(traffic_type),
+        type=_LOT_TYPES[traffic_type],
         traffic_type=traffic_type,
         volume=load_lot_volume(data['volume']),
         cost=load_lot_cost(data['cost']),
-        status=LotStatus(data['status']),
-        create_dt=parser.parse(data['creationDate'], ignoretz=True)
+        status=_get_enum(LotStatus, data['status']),
+        create_dt=_parse_datetime(data['creationDate'])
     )
 
 
@@ -124,12 +162,12 @@ def load_remain(data: Dict) -> containers.Remain:
     :raises:
         IncorrectFormatResponse: если отсутствуют параметры
     """
-    _assert_keys(data, ('type', 'rollover', 'status', 'remain', 'uom'))
+    _assert_keys(data, _REMAIN_KEYS)
     return containers.Remain(
-        type=RemainType(data['type']),
-        status=RemainStatus(data['status']),
+        type=_get_enum(RemainType, data['type']),
+        status=_get_enum(RemainStatus, data['status']),
         value=data['remain'],
-        unit=Unit(data['uom']),
+        unit=_get_enum(Unit, data['uom']),
         rollover=data['rollover']
     )
 
@@ -139,5 +177,5 @@ def load_rests(data: Dict) -> List[containers.Remain]:
     :raises:
         IncorrectFormatResponse: если отсутствует параметр 'rests'
     """
-    _assert_keys(data, ('rests',))
+    _assert_keys(data, _RESTS_KEYS)
     return [load_remain(remain) for remain in data['rests']]
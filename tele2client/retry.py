@@ -0,0 +1,77 @@
+import asyncio
+import random
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import FrozenSet, Optional
+
+from aiohttp import ClientConnectionError
+
+from tele2client import time_utils
+
+# Ошибки соединения, после которых запрос можно повторить
+RETRY_ERRORS = (ClientConnectionError, asyncio.TimeoutError)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Заголовок Retry-After содержит количество секунд или HTTP-дату
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(dt.timestamp() - time_utils.now_timestamp(), 0.0)
+
+
+class RetryPolicy(object):
+    """
+    Повтор запросов с экспоненциальной задержкой и случайным разбросом ("full jitter").
+    Ответ 429 повторяется для любого метода, т.к. запрос не был обработан.
+    Ответы 5xx и ошибки соединения повторяются только для идемпотентных методов.
+    Retry-After соблюдается полностью; если сервер просит ждать дольше max_delay, запрос не повторяется.
+    """
+
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    retry_statuses: FrozenSet[int]
+    idempotent_methods: FrozenSet[str]
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 30.0,
+                 retry_statuses: FrozenSet[int] = frozenset((500, 502, 503, 504)),
+                 idempotent_methods: FrozenSet[str] = frozenset(('GET', 'DELETE'))):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+        self.idempotent_methods = idempotent_methods
+
+    def can_retry(self, attempt: int) -> bool:
+        """
+        :param attempt: номер выполненной попытки, начиная с 1
+        """
+        return attempt < self.max_attempts
+
+    def can_wait(self, delay: float) -> bool:
+        return delay <= self.max_delay
+
+    def should_retry_status(self, method: str, status: int) -> bool:
+        if status == HTTPStatus.TOO_MANY_REQUESTS:
+            return True
+        return status in self.retry_statuses and method in self.idempotent_methods
+
+    def should_retry_error(self, method: str) -> bool:
+        return method in self.idempotent_methods
+
+    def get_delay(self, attempt: int, retry_after: float = None) -> float:
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
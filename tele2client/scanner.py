@@ -0,0 +1,91 @@
+import asyncio
+from typing import AsyncIterator, Iterable, Tuple
+
+from aiohttp import ClientSession
+
+from tele2client import containers, scheduler
+from tele2client.api import ApiSettings, ApiTele2, create_connector, create_session
+from tele2client.enums import Priority
+
+DEFAULT_CONCURRENCY = 50
+
+
+class FleetScanner(object):
+    """
+    Параллельный опрос баланса и остатков для многих номеров.
+    Одновременно выполняется не более concurrency запросов, результаты возвращаются по мере готовности.
+    """
+
+    concurrency: int
+    session: ClientSession
+    settings: ApiSettings
+
+    def __init__(self, session: ClientSession = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 settings: ApiSettings = None):
+        """
+        :param session: общая сессия (например, Tele2ClientPool.session); если не задана, создается своя
+        """
+        self.concurrency = concurrency
+        self._own_session = session is None
+        if session is None:
+            metrics_sink = None if settings is None else settings.metrics_sink
+            session = create_session(create_connector(concurrency), metrics_sink=metrics_sink)
+        self.session = session
+        self.settings = settings
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        if self._own_session:
+            await self.session.close()
+
+    async def _scan_one(self, phone_number: str, access_token: containers.AccessToken,
+                        balance: bool, rests: bool) -> containers.ScanResult:
+        api = ApiTele2(self.session, phone_number, access_token, self.settings)
+        result = containers.ScanResult(phone_number=phone_number)
+        try:
+            # Опрос многих номеров не должен задерживать изменения лотов при общем планировщике
+            with scheduler.priority(Priority.BACKGROUND):
+                if balance:
+                    result = result._replace(balance=await api.get_balance())
+                if rests:
+                    result = result._replace(rests=await api.get_rests())
+        except Exception as e:
+            # Ошибка одного номера не должна прерывать опрос остальных
+            return result._replace(error=e)
+        return result
+
+    async def scan(self, accounts: Iterable[Tuple[str, containers.AccessToken]],
+                   balance: bool = True, rests: bool = True) -> AsyncIterator[containers.ScanResult]:
+        """
+        :param accounts: пары (номер телефона, токен доступа)
+        :return: результаты в порядке завершения; ошибки сохраняются в ScanResult.error
+        """
+        accounts_iterator = iter(accounts)
+        results = asyncio.Queue()
+
+        async def worker():
+            try:
+                # Итератор общий для всех обработчиков, поэтому каждый номер опрашивается один раз
+                for phone_number, access_token in accounts_iterator:
+                    await results.put(await self._scan_one(phone_number, access_token, balance, rests))
+            finally:
+                await results.put(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            active_workers = len(workers)
+            while active_workers:
+                result = await results.get()
+                if result is None:
+                    active_workers -= 1
+                else:
+                    yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
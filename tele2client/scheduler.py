@@ -0,0 +1,167 @@
+"""
+Планировщик запросов с приоритетами и общим лимитом одновременных запросов.
+
+Запросы ожидают свободный слот в очереди своего приоритета; внутри приоритета номера обслуживаются
+по кругу, поэтому номер с большим количеством запросов не задерживает остальные. Приоритет ожидающего
+запроса повышается на один уровень каждые aging секунд, поэтому фоновые запросы не ждут бесконечно.
+
+Приоритет по умолчанию зависит от метода API и может быть изменен для блока кода:
+
+    with scheduler.priority(Priority.BACKGROUND):
+        await client.get_lots()
+"""
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, Optional
+
+from tele2client import time_utils
+from tele2client.enums import Endpoint, Priority
+
+DEFAULT_CONCURRENCY = 100
+DEFAULT_AGING = 1.0
+
+_priority: ContextVar[Optional[Priority]] = ContextVar('tele2client_priority', default=None)
+
+
+@contextmanager
+def priority(value: Priority) -> Iterator[Priority]:
+    token = _priority.set(value)
+    try:
+        yield value
+    finally:
+        _priority.reset(token)
+
+
+def get_priority(endpoint: Endpoint, method: str) -> Priority:
+    """
+    Изменения лотов и авторизация - INTERACTIVE, получение лотов - POLLING, баланс и остатки - BACKGROUND
+    """
+    value = _priority.get()
+    if value is not None:
+        return value
+    if method != 'GET' or endpoint in (Endpoint.TOKEN, Endpoint.VALIDATION_NUMBER):
+        return Priority.INTERACTIVE
+    if endpoint in (Endpoint.LOTS, Endpoint.LOT):
+        return Priority.POLLING
+    return Priority.BACKGROUND
+
+
+class Waiter(object):
+    future: asyncio.Future
+    priority: Priority
+    phone_number: str
+    enqueued_at: float
+
+    def __init__(self, future: asyncio.Future, priority: Priority, phone_number: str):
+        self.future = future
+        self.priority = priority
+        self.phone_number = phone_number
+        self.enqueued_at = time_utils.monotonic_timestamp()
+
+
+class RequestScheduler(object):
+    """
+    Общий для нескольких ApiTele2 лимит одновременных запросов (ApiSettings.scheduler)
+    """
+
+    concurrency: int
+    aging: float
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, aging: float = DEFAULT_AGING):
+        """
+        :param aging: через сколько секунд ожидания приоритет запроса повышается на один уровень
+        """
+        self.concurrency = concurrency
+        self.aging = aging
+        self._active = 0
+        # Для каждого приоритета: очереди номеров в порядке обслуживания по кругу
+        self._queues: Dict[Priority, 'OrderedDict[str, Deque[Waiter]]'] = {value: OrderedDict() for value in Priority}
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def get_waiting(self) -> Dict[Priority, int]:
+        return {value: sum(len(waiters) for waiters in queues.values()) for value, queues in self._queues.items()}
+
+    def _has_waiters(self) -> bool:
+        return any(self._queues.values())
+
+    def _enqueue(self, waiter: Waiter):
+        queues = self._queues[waiter.priority]
+        waiters = queues.get(waiter.phone_number)
+        if waiters is None:
+            waiters = deque()
+            queues[waiter.phone_number] = waiters
+        waiters.append(waiter)
+
+    def _remove(self, waiter: Waiter):
+        queues = self._queues[waiter.priority]
+        waiters = queues.get(waiter.phone_number)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del queues[waiter.phone_number]
+
+    def _get_effective_priority(self, waiter: Waiter, now: float) -> float:
+        if self.aging <= 0:
+            return waiter.priority
+        return waiter.priority - (now - waiter.enqueued_at) / self.aging
+
+    def _pop_next(self) -> Optional[Waiter]:
+        now = time_utils.monotonic_timestamp()
+        selected_queues = None
+        selected_priority = None
+        for queues in self._queues.values():
+            if not queues:
+                continue
+            # Первый номер в очереди приоритета - следующий по кругу
+            waiter = next(iter(queues.values()))[0]
+            effective_priority = self._get_effective_priority(waiter, now)
+            if selected_priority is None or effective_priority < selected_priority:
+                selected_queues = queues
+                selected_priority = effective_priority
+
+        if selected_queues is None:
+            return None
+
+        phone_number, waiters = next(iter(selected_queues.items()))
+        waiter = waiters.popleft()
+        if waiters:
+            selected_queues.move_to_end(phone_number)
+        else:
+            del selected_queues[phone_number]
+        return waiter
+
+    def _wake(self):
+        while self._active < self.concurrency:
+            waiter = self._pop_next()
+            if waiter is None:
+                return
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                self._active += 1
+
+    async def acquire(self, priority: Priority, phone_number: str):
+        if self._active < self.concurrency and not self._has_waiters():
+            self._active += 1
+            return
+
+        waiter = Waiter(asyncio.get_running_loop().create_future(), priority, phone_number)
+        self._enqueue(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Слот уже выделен, но ожидающий отменен: слот передается следующему
+                self.release()
+            else:
+                self._remove(waiter)
+            raise
+
+    def release(self):
+        self._active -= 1
+        self._wake()
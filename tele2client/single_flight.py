@@ -0,0 +1,34 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight(object):
+    """
+    Объединение одинаковых конкурентных вызовов: пока выполняется вызов с ключом key,
+    остальные вызовы с тем же ключом ожидают его результат, а не выполняют запрос повторно.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Исключение считается полученным, даже если все ожидающие были отменены
+        if not future.cancelled():
+            future.exception()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda done_future: self._forget(key, done_future))
+
+        # Отмена одного из ожидающих не отменяет общий вызов
+        result = await asyncio.shield(future)
+        # Каждый вызывающий получает свою копию списка
+        return list(result) if isinstance(result, list) else result
@@ -0,0 +1,229 @@
+"""
+Синхронный интерфейс для многопоточного кода.
+
+Все запросы выполняются в одном долгоживущем цикле событий в фоновом потоке с общей сессией,
+поэтому соединения переиспользуются между вызовами, в отличие от asyncio.run(...) на каждый вызов.
+Методы Tele2SyncClient блокируют вызывающий поток; submit возвращает concurrent.futures.Future
+и подходит для параллельной отправки запросов из пула потоков.
+"""
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+from tele2client import batch, containers, timeouts
+from tele2client.api import DEFAULT_CONNECTIONS_LIMIT, ApiSettings
+from tele2client.client import Tele2Client
+from tele2client.pool import Tele2ClientPool
+from tele2client.rate_limiter import TokenBucket
+from tele2client.token_store import BaseTokenStore
+
+SyncSmsCodeGetterType = Callable[[], str]
+
+
+class EventLoopThread(object):
+    """
+    Цикл событий в фоновом потоке и пул клиентов с общей сессией.
+    Один EventLoopThread можно использовать для нескольких Tele2SyncClient.
+    """
+
+    loop: asyncio.AbstractEventLoop
+    pool: Tele2ClientPool
+
+    def __init__(self, connections_limit: int = DEFAULT_CONNECTIONS_LIMIT,
+                 settings_factory: Callable[[], ApiSettings] = None, token_store: BaseTokenStore = None):
+        """
+        :param settings_factory: создает ApiSettings в потоке цикла событий, т.к. примитивы asyncio
+            (например, в RateLimiter) должны создаваться в том цикле, в котором используются
+        """
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='tele2client-loop', daemon=True)
+        self._thread.start()
+        self.pool = self.run(self._create_pool(connections_limit, settings_factory, token_store))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @staticmethod
+    async def _create_pool(connections_limit: int, settings_factory: Callable[[], ApiSettings],
+                           token_store: BaseTokenStore) -> Tele2ClientPool:
+        settings = None if settings_factory is None else settings_factory()
+        return Tele2ClientPool(connections_limit, settings=settings, token_store=token_store)
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    def submit(self, awaitable: Awaitable[Any]) -> Future:
+        return asyncio.run_coroutine_threadsafe(awaitable, self.loop)
+
+    def run(self, awaitable: Awaitable[Any]) -> Any:
+        future = self.submit(awaitable)
+        try:
+            return future.result()
+        except BaseException:
+            # Например, KeyboardInterrupt в вызывающем потоке: запрос в цикле событий отменяется
+            future.cancel()
+            raise
+
+    def close(self):
+        if not self.is_running:
+            return
+        self.run(self.pool.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+_default_loop_thread: Optional[EventLoopThread] = None
+_default_loop_thread_lock = threading.Lock()
+
+
+def get_default_loop_thread() -> EventLoopThread:
+    """
+    Общий цикл событий для клиентов, созданных без loop_thread; создается при первом обращении
+    и закрывается при завершении программы
+    """
+    global _default_loop_thread
+    with _default_loop_thread_lock:
+        if _default_loop_thread is None or not _default_loop_thread.is_running:
+            _default_loop_thread = EventLoopThread()
+            atexit.register(_default_loop_thread.close)
+        return _default_loop_thread
+
+
+class Tele2SyncClient(object):
+    """
+    Блокирующие аналоги методов Tele2Client
+    """
+
+    phone_number: str
+    loop_thread: EventLoopThread
+    timeout: float
+
+    def __init__(self, phone_number: str, loop_thread: EventLoopThread = None, timeout: float = None):
+        """
+        :param loop_thread: цикл событий с пулом клиентов; если не задан, используется get_default_loop_thread()
+        :param timeout: срок выполнения каждого вызова в секундах (timeouts.deadline)
+        """
+        self.phone_number = phone_number
+        self.timeout = timeout
+        self.loop_thread = get_default_loop_thread() if loop_thread is None else loop_thread
+        self._client: Tele2Client = self.loop_thread.run(self._get_client())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    async def _get_client(self) -> Tele2Client:
+        return self.loop_thread.pool.get_client(self.phone_number)
+
+    def close(self):
+        """
+        Удаляет клиент из пула; цикл событий и сессия остаются открытыми для других клиентов
+        """
+        if self.loop_thread.is_running:
+            self.loop_thread.run(self._remove_client())
+
+    async def _remove_client(self):
+        self.loop_thread.pool.remove_client(self.phone_number)
+
+    async def _call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        if self.timeout is None:
+            return await func(*args, **kwargs)
+        with timeouts.deadline(self.timeout):
+            return await func(*args, **kwargs)
+
+    def submit(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Future:
+        """
+        Выполняет метод Tele2Client в цикле событий без ожидания результата:
+
+            future = sync_client.submit(Tele2Client.get_balance)
+
+        :param func: метод Tele2Client; первым аргументом передается клиент
+        """
+        return self.loop_thread.submit(self._call(func, self._client, *args, **kwargs))
+
+    def _run(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        return self.loop_thread.run(self._call(func, self._client, *args, **kwargs))
+
+    @property
+    def access_token(self) -> containers.AccessToken:
+        return self._client.access_token
+
+    def auth_with_params(self, access_token: containers.AccessToken, phone_number: str = None):
+        """
+        При смене номера используется клиент пула для нового номера
+        """
+        self.loop_thread.run(self._auth_with_params(access_token, phone_number))
+
+    async def _auth_with_params(self, access_token: containers.AccessToken, phone_number: str = None):
+        if phone_number is not None and phone_number != self.phone_number:
+            self.loop_thread.pool.remove_client(self.phone_number)
+            self.phone_number = phone_number
+            self._client = self.loop_thread.pool.get_client(phone_number)
+        await self._client.auth_with_params(access_token)
+
+    def auth(self, sms_code_getter: SyncSmsCodeGetterType, limiter: TokenBucket = None) -> bool:
+        """
+        :param sms_code_getter: блокирующая функция получения смс-кода; выполняется в пуле потоков цикла событий
+        """
+
+        async def get_sms_code() -> str:
+            return await asyncio.get_event_loop().run_in_executor(None, sms_code_getter)
+
+        # Ожидание смс-кода ограничено Tele2Client.ENTER_SMS_CODE_TIMEOUT, а не сроком вызова
+        return self.loop_thread.run(self._client.auth(get_sms_code, limiter))
+
+    def refresh_token(self) -> bool:
+        return self._run(Tele2Client.refresh_token)
+
+    def is_authorized(self, force_check: bool = False) -> bool:
+        return self._run(Tele2Client.is_authorized, force_check)
+
+    def get_balance(self) -> float:
+        return self._run(Tele2Client.get_balance)
+
+    def create_lot(self, lot: containers.Lot) -> containers.LotInfo:
+        return self._run(Tele2Client.create_lot, lot)
+
+    def edit_lot(self, lot_info: containers.LotInfo) -> containers.LotInfo:
+        return self._run(Tele2Client.edit_lot, lot_info)
+
+    def delete_lot(self, lot_id: str) -> bool:
+        return self._run(Tele2Client.delete_lot, lot_id)
+
+    def create_lots(self, lots: Iterable[containers.Lot],
+                    concurrency: int = batch.DEFAULT_CONCURRENCY) -> List[containers.BatchResult]:
+        return self._run(Tele2Client.create_lots, list(lots), concurrency)
+
+    def edit_lots(self, lot_infos: Iterable[containers.LotInfo],
+                  concurrency: int = batch.DEFAULT_CONCURRENCY) -> List[containers.BatchResult]:
+        return self._run(Tele2Client.edit_lots, list(lot_infos), concurrency)
+
+    def delete_lots(self, lot_ids: Iterable[str],
+                    concurrency: int = batch.DEFAULT_CONCURRENCY) -> List[containers.BatchResult]:
+        return self._run(Tele2Client.delete_lots, list(lot_ids), concurrency)
+
+    def reconcile_lots(self, desired: Iterable[containers.Lot], emojis: List[str] = None,
+                       concurrency: int = batch.DEFAULT_CONCURRENCY) -> containers.ReconcileResult:
+        return self._run(Tele2Client.reconcile_lots, list(desired), emojis, concurrency)
+
+    def get_lots(self) -> List[containers.LotInfo]:
+        return self._run(Tele2Client.get_lots)
+
+    def get_rests(self) -> List[containers.Remain]:
+        return self._run(Tele2Client.get_rests)
+
+    def get_sellable_rests(self) -> List[containers.Remain]:
+        return self._run(Tele2Client.get_sellable_rests)
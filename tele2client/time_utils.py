@@ -1,7 +1,7 @@
 import os
 
-from datetime import datetime
-from time import time
+from datetime import datetime, timedelta
+from time import monotonic, time
 
 
 def set_tim_zone():
@@ -12,10 +12,18 @@ def now_timestamp() -> float:
     return time()
 
 
+def monotonic_timestamp() -> float:
+    return monotonic()
+
+
 def is_expired(dt: datetime) -> bool:
     return datetime.now() >= dt
 
 
+def is_expiring(dt: datetime, ahead_seconds: float) -> bool:
+    return datetime.now() + timedelta(seconds=ahead_seconds) >= dt
+
+
 def is_expired_timestamp(time_us: float) -> bool:
     return now_timestamp() >= time_us
 
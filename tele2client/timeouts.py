@@ -0,0 +1,146 @@
+"""
+Таймауты запросов и общий срок выполнения (deadline).
+
+Срок хранится в contextvars и поэтому действует для всех запросов внутри блока deadline,
+включая повторы, пакетные вызовы (tele2client.batch) и вызовы Tele2Client:
+
+    with timeouts.deadline(5):
+        await client.get_lots()
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Iterator, Mapping, Optional
+
+from aiohttp import ClientTimeout
+
+from tele2client import exceptions, time_utils
+from tele2client.enums import Endpoint
+
+# connect в aiohttp включает ожидание свободного соединения пула, поэтому ограничивается только
+# установка соединения (sock_connect), а ожидание пула ограничено общим временем total
+DEFAULT_TIMEOUT = ClientTimeout(total=30, sock_connect=5, sock_read=15)
+
+# Момент (time_utils.monotonic_timestamp), после которого запросы не выполняются
+_deadline: ContextVar[Optional[float]] = ContextVar('tele2client_deadline', default=None)
+
+
+class TimeoutPolicy(object):
+    """
+    Таймауты aiohttp для каждого метода API; для остальных методов используется default
+    """
+
+    default: ClientTimeout
+    endpoints: Mapping[Endpoint, ClientTimeout]
+
+    def __init__(self, default: ClientTimeout = DEFAULT_TIMEOUT, endpoints: Mapping[Endpoint, ClientTimeout] = None):
+        self.default = default
+        self.endpoints = {} if endpoints is None else dict(endpoints)
+
+    def get_base(self, endpoint: Endpoint) -> ClientTimeout:
+        """
+        Таймаут метода без учета срока выполнения
+        """
+        return self.endpoints.get(endpoint, self.default)
+
+    def get(self, endpoint: Endpoint) -> ClientTimeout:
+        """
+        Таймаут метода, общее время которого ограничено оставшимся сроком выполнения
+
+        :raises:
+            DeadlineExceeded: если срок выполнения истек
+        """
+        timeout = self.get_base(endpoint)
+        remaining = get_remaining()
+        if remaining is None or (timeout.total is not None and timeout.total <= remaining):
+            return timeout
+        # total=0 в aiohttp означает отсутствие ограничения, поэтому истекший срок проверяется отдельно
+        check()
+        return ClientTimeout(
+            total=remaining,
+            connect=timeout.connect,
+            sock_read=timeout.sock_read,
+            sock_connect=timeout.sock_connect
+        )
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[float]:
+    """
+    Ограничивает время выполнения запросов внутри блока. Вложенный блок не может продлить внешний срок.
+    """
+    at = time_utils.monotonic_timestamp() + seconds
+    current = _deadline.get()
+    if current is not None:
+        at = min(at, current)
+
+    token = _deadline.set(at)
+    try:
+        yield at
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def no_deadline() -> Iterator[None]:
+    """
+    Снимает срок выполнения внутри блока, например, для общего запроса нескольких вызывающих
+    """
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def get_remaining() -> Optional[float]:
+    """
+    :return: оставшееся время в секундах или None, если срок не задан
+    """
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - time_utils.monotonic_timestamp()
+
+
+def allows(seconds: float) -> bool:
+    """
+    Можно ли подождать seconds секунд и выполнить еще один запрос до окончания срока
+    """
+    remaining = get_remaining()
+    return remaining is None or remaining > seconds
+
+
+def check():
+    """
+    :raises:
+        DeadlineExceeded: если срок выполнения истек
+    """
+    if not allows(0):
+        raise exceptions.DeadlineExceeded('Истек срок выполнения запроса')
+
+
+async def wait(awaitable: Awaitable[Any]) -> Any:
+    """
+    Ожидает awaitable не дольше оставшегося срока; по истечении срока ожидание отменяется
+
+    :raises:
+        DeadlineExceeded: если срок выполнения истек
+    """
+    remaining = get_remaining()
+    if remaining is None:
+        return await awaitable
+
+    try:
+        check()
+    except exceptions.DeadlineExceeded:
+        # Корутина не будет выполнена: закрывается, чтобы не было предупреждения "was never awaited"
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except asyncio.TimeoutError as e:
+        if allows(0):
+            raise
+        raise exceptions.DeadlineExceeded('Истек срок выполнения запроса') from e
@@ -0,0 +1,218 @@
+"""
+Хранилища токенов доступа. Запись выполняется пакетами в отдельном потоке,
+поэтому сохранение токена не блокирует цикл событий.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+
+from tele2client import containers, time_utils
+from tele2client.wrappers import LoggerWrap
+
+# Значение None в пакете изменений означает удаление токена
+TokenChanges = Dict[str, Optional[containers.AccessToken]]
+
+
+def is_valid(access_token: containers.AccessToken) -> bool:
+    return bool(access_token.token) and access_token.expired_dt is not None \
+        and not time_utils.is_expired(access_token.expired_dt)
+
+
+def token2dict(access_token: containers.AccessToken) -> Dict:
+    return {
+        'token': access_token.token,
+        'expired_dt': None if access_token.expired_dt is None else access_token.expired_dt.isoformat(),
+        'refresh_token': access_token.refresh_token
+    }
+
+
+def dict2token(data: Dict) -> containers.AccessToken:
+    expired_dt = data.get('expired_dt')
+    return containers.AccessToken(
+        token=data.get('token', ''),
+        expired_dt=None if expired_dt is None else datetime.fromisoformat(expired_dt),
+        refresh_token=data.get('refresh_token', '')
+    )
+
+
+class BaseTokenStore(object):
+    """
+    Интерфейс хранилища. save и delete только добавляют изменение в очередь,
+    запись выполняется через flush_delay секунд одним пакетом.
+    Наследники реализуют _read_all и _write, которые выполняются в отдельном потоке.
+    """
+
+    FLUSH_DELAY = 1.0
+
+    flush_delay: float
+
+    def __init__(self, flush_delay: float = None):
+        self.flush_delay = self.FLUSH_DELAY if flush_delay is None else flush_delay
+        self._pending: TokenChanges = {}
+        self._flush_task: Optional[asyncio.Future] = None
+        # Один поток выполняет все операции с хранилищем по порядку
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def _read_all(self) -> Dict[str, containers.AccessToken]:
+        raise NotImplementedError
+
+    def _write(self, changes: TokenChanges):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    async def _run(self, func, *args):
+        return await asyncio.get_event_loop().run_in_executor(self._executor, func, *args)
+
+    async def load_all(self) -> Dict[str, containers.AccessToken]:
+        tokens = await self._run(self._read_all)
+        tokens.update({phone_number: token for phone_number, token in self._pending.items() if token is not None})
+        for phone_number in [phone_number for phone_number, token in self._pending.items() if token is None]:
+            tokens.pop(phone_number, None)
+        return tokens
+
+    async def load_valid(self) -> Dict[str, containers.AccessToken]:
+        """
+        Токены, срок действия которых еще не истек
+        """
+        tokens = await self.load_all()
+        return {phone_number: token for phone_number, token in tokens.items() if is_valid(token)}
+
+    def save(self, phone_number: str, access_token: containers.AccessToken):
+        self._pending[phone_number] = access_token
+        self._schedule_flush()
+
+    def delete(self, phone_number: str):
+        self._pending[phone_number] = None
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.flush_delay)
+        try:
+            await self.flush()
+        except Exception as e:
+            # Изменения остаются в очереди и записываются при следующем flush
+            LoggerWrap().get_logger().exception(f'Не удалось сохранить токены: {e}')
+
+    async def flush(self):
+        """
+        Если запись не удалась, изменения возвращаются в очередь
+        """
+        if not self._pending:
+            return
+
+        changes, self._pending = self._pending, {}
+        try:
+            await self._run(self._write, changes)
+        except BaseException:
+            # Изменения, сделанные во время записи, новее изменений пакета
+            changes.update(self._pending)
+            self._pending = changes
+            raise
+
+    async def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+
+class JsonFileTokenStore(BaseTokenStore):
+    """Хранилище в JSON-файле: {номер телефона: токен}"""
+
+    path: str
+
+    def __init__(self, path: str, flush_delay: float = None):
+        super().__init__(flush_delay)
+        self.path = os.path.abspath(path)
+        self._tokens: Optional[Dict[str, Dict]] = None
+
+    def _read_file(self) -> Dict[str, Dict]:
+        if self._tokens is None:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as fin:
+                    self._tokens = json.load(fin)
+            else:
+                self._tokens = {}
+        return self._tokens
+
+    def _read_all(self) -> Dict[str, containers.AccessToken]:
+        return {phone_number: dict2token(data) for phone_number, data in self._read_file().items()}
+
+    def _write(self, changes: TokenChanges):
+        tokens = self._read_file()
+        for phone_number, access_token in changes.items():
+            if access_token is None:
+                tokens.pop(phone_number, None)
+            else:
+                tokens[phone_number] = token2dict(access_token)
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fout:
+            json.dump(tokens, fout)
+        # Файл заменяется целиком, чтобы при сбое не остался частично записанный JSON
+        os.replace(tmp_path, self.path)
+
+
+class SqliteTokenStore(BaseTokenStore):
+    """Хранилище в базе SQLite"""
+
+    path: str
+
+    def __init__(self, path: str, flush_delay: float = None):
+        super().__init__(flush_delay)
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS access_tokens ('
+                'phone_number TEXT PRIMARY KEY, token TEXT, expired_dt TEXT, refresh_token TEXT)'
+            )
+        return self._connection
+
+    def _read_all(self) -> Dict[str, containers.AccessToken]:
+        rows = self._connect().execute('SELECT phone_number, token, expired_dt, refresh_token FROM access_tokens')
+        return {
+            phone_number: dict2token({'token': token, 'expired_dt': expired_dt, 'refresh_token': refresh_token})
+            for phone_number, token, expired_dt, refresh_token in rows
+        }
+
+    def _write(self, changes: TokenChanges):
+        saved = []
+        deleted = []
+        for phone_number, access_token in changes.items():
+            if access_token is None:
+                deleted.append((phone_number,))
+            else:
+                data = token2dict(access_token)
+                saved.append((phone_number, data['token'], data['expired_dt'], data['refresh_token']))
+
+        connection = self._connect()
+        with connection:
+            connection.executemany('INSERT OR REPLACE INTO access_tokens VALUES (?, ?, ?, ?)', saved)
+            connection.executemany('DELETE FROM access_tokens WHERE phone_number = ?', deleted)
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
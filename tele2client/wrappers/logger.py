@@ -1,11 +1,16 @@
+import copy
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
-from typing import AnyStr
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from typing import AnyStr, Dict, Optional, Tuple
+
+from tele2client import time_utils
 
 
 class LoggerWrap(object):
     __log_name: AnyStr = None
+    __listener: Optional[QueueListener] = None
 
     def __new__(cls):
         if not hasattr(cls, 'instance'):
@@ -18,6 +23,82 @@ class LoggerWrap(object):
     def get_logger(self) -> logging.Logger:
         return logging.getLogger(self.__log_name)
 
+    def set_listener(self, listener: Optional[QueueListener]):
+        self.stop()
+        self.__listener = listener
+
+    def stop(self):
+        """
+        Останавливает фоновую запись логов, дописав сообщения из очереди
+        """
+        if self.__listener is not None:
+            self.__listener.stop()
+            self.__listener = None
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Ограничивает количество одинаковых сообщений: не более burst сообщений за interval секунд.
+    Сообщения считаются одинаковыми, если совпадают уровень, место вызова и тип исключения
+    (например, повторяющиеся ApiException для разных номеров), а для сообщений без исключения -
+    первая строка текста. Количество пропущенных сообщений добавляется к первому сообщению следующего интервала.
+    """
+    MAX_KEYS = 10000
+
+    interval: float
+    burst: int
+
+    def __init__(self, interval: float = 60.0, burst: int = 1):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        # ключ -> (начало интервала, количество сообщений в интервале, пропущено)
+        self._windows: Dict[Tuple, Tuple[float, int, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if record.exc_info and record.exc_info[0] is not None:
+            message_type = record.exc_info[0].__name__
+        else:
+            message_type = message.split('\n', 1)[0]
+        key = (record.levelno, record.pathname, record.lineno, message_type)
+        now = time_utils.monotonic_timestamp()
+        if key not in self._windows and len(self._windows) >= self.MAX_KEYS:
+            self._remove_expired(now)
+
+        start, count, skipped = self._windows.get(key, (now, 0, 0))
+        if now - start >= self.interval:
+            if skipped:
+                record.msg = f'{message} (пропущено повторов: {skipped})'
+                record.args = None
+            start, count, skipped = now, 0, 0
+
+        if count >= self.burst:
+            self._windows[key] = (start, count, skipped + 1)
+            return False
+
+        self._windows[key] = (start, count + 1, skipped)
+        return True
+
+    def _remove_expired(self, now: float):
+        for key in [key for key, (start, _, _) in self._windows.items() if now - start >= self.interval]:
+            del self._windows[key]
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler.prepare форматирует запись (включая traceback) в вызывающем потоке.
+    Здесь в очередь передается копия записи только с подставленными аргументами сообщения,
+    а сообщение и traceback форматирует обработчик QueueListener в своем потоке.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Аргументы подставляются сразу: изменяемые объекты могут измениться до записи
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
 
 def __get_default_formatter() -> logging.Formatter:
     return logging.Formatter('[{asctime}] [{filename}::{lineno}] [{levelname}] {message}', style='{')
@@ -40,7 +121,14 @@ def __create_file(name: AnyStr) -> AnyStr:
     return file_name
 
 
-def create(name: str, level: int, handler=None, formatter=None) -> LoggerWrap:
+def create(name: str, level: int, handler=None, formatter=None, use_queue: bool = False,
+           repeat_interval: float = None, repeat_burst: int = 1) -> LoggerWrap:
+    """
+    :param use_queue: записывать логи в отдельном потоке (QueueHandler/QueueListener),
+        чтобы запись в файл не блокировала цикл событий
+    :param repeat_interval: если задан, одинаковые сообщения пропускаются, когда их больше repeat_burst
+        за repeat_interval секунд
+    """
     file_name = __create_file(name)
 
     if formatter is None:
@@ -51,9 +139,20 @@ def create(name: str, level: int, handler=None, formatter=None) -> LoggerWrap:
 
     logger = logging.getLogger(file_name)
     logger.setLevel(level)
-    logger.addHandler(handler)
     logger.propagate = False
 
+    if repeat_interval is not None:
+        logger.addFilter(RepeatFilter(repeat_interval, repeat_burst))
+
     logger_wrap = LoggerWrap()
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        logger.addHandler(DeferredQueueHandler(log_queue))
+        logger_wrap.set_listener(listener)
+        listener.start()
+    else:
+        logger.addHandler(handler)
+
     logger_wrap.set_log_name(file_name)
     return logger_wrap
@@ -0,0 +1,17 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from tele2client.api import ApiSettings, ApiTele2, create_session
+from tele2client.endpoints import EndpointRegistry
+from tele2client.mock_server import MockSettings, MockTele2Server
+
+PHONE_NUMBER = '79990000001'
+
+
+@asynccontextmanager
+async def create_api(mock_settings: MockSettings, settings: ApiSettings = None) -> AsyncIterator[ApiTele2]:
+    settings = ApiSettings() if settings is None else settings
+    async with MockTele2Server(mock_settings) as server:
+        settings = settings._replace(endpoints=EndpointRegistry.from_base_url(server.url))
+        async with create_session() as session:
+            yield ApiTele2(session, PHONE_NUMBER, server.issue_token(PHONE_NUMBER), settings)
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientTimeout
+
+from tele2client import exceptions, timeouts
+from tele2client.api import ApiSettings
+from tele2client.circuit_breaker import CircuitBreaker
+from tele2client.enums import CircuitState, Endpoint
+from tele2client.mock_server import MockSettings
+from tele2client.retry import RetryPolicy
+
+from tests.helpers import create_api
+
+SLOW_SERVER = MockSettings(latency=0.5)
+
+
+def create_settings(**kwargs) -> ApiSettings:
+    return ApiSettings(
+        circuit_breaker=CircuitBreaker(failure_threshold=2, cooldown=60),
+        retry_policy=RetryPolicy(max_attempts=1),
+        **kwargs
+    )
+
+
+def test_deadline_does_not_open_circuit():
+    async def run():
+        settings = create_settings()
+        async with create_api(SLOW_SERVER, settings) as api:
+            # Удаление не выполняется общим запросом, поэтому таймаут aiohttp ограничен сроком вызывающего
+            for _ in range(3):
+                with timeouts.deadline(0.2):
+                    with pytest.raises(exceptions.DeadlineExceeded):
+                        await api.delete_lot('1')
+
+            assert settings.circuit_breaker.get_state(Endpoint.LOT) == CircuitState.CLOSED
+            assert not await api.delete_lot('1')
+
+    asyncio.run(run())
+
+
+def test_endpoint_timeout_opens_circuit():
+    async def run():
+        settings = create_settings(timeouts=timeouts.TimeoutPolicy(endpoints={
+            Endpoint.BALANCE: ClientTimeout(total=0.2)
+        }))
+        async with create_api(SLOW_SERVER, settings) as api:
+            for _ in range(2):
+                with pytest.raises(asyncio.TimeoutError):
+                    await api.get_balance()
+
+            assert settings.circuit_breaker.get_state(Endpoint.BALANCE) == CircuitState.OPEN
+            with pytest.raises(exceptions.CircuitOpen):
+                await api.get_balance()
+
+    asyncio.run(run())
+
+
+def test_server_errors_open_circuit():
+    async def run():
+        settings = create_settings()
+        async with create_api(MockSettings(error_rate=1.0), settings) as api:
+            for _ in range(2):
+                with pytest.raises(exceptions.ApiException):
+                    await api.get_balance()
+
+            assert settings.circuit_breaker.get_state(Endpoint.BALANCE) == CircuitState.OPEN
+
+    asyncio.run(run())
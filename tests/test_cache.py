@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from tele2client import containers, time_utils
+from tele2client.api import ApiSettings
+from tele2client.cache import ResponseCache
+from tele2client.enums import Endpoint, LotStatus, LotType, TrafficType, Unit
+from tele2client.mock_server import MockSettings
+
+from tests.helpers import PHONE_NUMBER, create_api
+
+LOT = containers.Lot(LotType.VOICE, containers.LotVolume(50, Unit.MINUTES), 40)
+
+
+def create_lot_info(lot_id: str) -> containers.LotInfo:
+    return containers.LotInfo(
+        id=lot_id,
+        seller=containers.SellerLot(),
+        type=LotType.VOICE,
+        traffic_type=TrafficType.VOICE,
+        volume=LOT.volume,
+        cost=containers.LotCost(40, 'rub'),
+        status=LotStatus.ACTIVE,
+        create_dt=datetime(2024, 1, 1)
+    )
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time_utils, 'monotonic_timestamp', lambda: now[0])
+    return now
+
+
+def test_expires_after_ttl(clock):
+    cache = ResponseCache(ttls={Endpoint.BALANCE: 10})
+    cache.set(PHONE_NUMBER, Endpoint.BALANCE, 100.0)
+    assert cache.get(PHONE_NUMBER, Endpoint.BALANCE) == (True, 100.0)
+
+    clock[0] += 10
+    assert cache.get(PHONE_NUMBER, Endpoint.BALANCE) == (False, None)
+
+
+def test_stale_version_is_not_stored():
+    cache = ResponseCache()
+    version = cache.get_version(PHONE_NUMBER, Endpoint.LOTS)
+    cache.add_lot(PHONE_NUMBER, create_lot_info('1'))
+
+    cache.set(PHONE_NUMBER, Endpoint.LOTS, [], version)
+    assert cache.get(PHONE_NUMBER, Endpoint.LOTS) == (False, None)
+
+
+def test_revoke_lot_keeps_lot():
+    cache = ResponseCache()
+    cache.set(PHONE_NUMBER, Endpoint.LOTS, [create_lot_info('1'), create_lot_info('2')])
+    cache.revoke_lot(PHONE_NUMBER, '1')
+
+    _, lots = cache.get(PHONE_NUMBER, Endpoint.LOTS)
+    assert [(lot.id, lot.status) for lot in lots] == [('1', LotStatus.REVOKED), ('2', LotStatus.ACTIVE)]
+
+
+def test_write_through():
+    async def run():
+        async with create_api(MockSettings(), ApiSettings(cache=ResponseCache())) as api:
+            assert await api.get_lots() == []
+            lot_info = await api.create_lot(LOT)
+            assert await api.get_lots() == [lot_info]
+
+            assert await api.delete_lot(lot_info.id)
+            assert await api.get_lots() == [lot_info._replace(status=LotStatus.REVOKED)]
+
+    asyncio.run(run())
+
+
+def test_read_started_before_write_is_not_cached():
+    async def run():
+        async with create_api(MockSettings(latency=0.2), ApiSettings(cache=ResponseCache())) as api:
+            read = asyncio.ensure_future(api.get_lots())
+            await asyncio.sleep(0.05)
+            lot_info = await api.create_lot(LOT)
+
+            assert await read == []
+            assert await api.get_lots() == [lot_info]
+
+    asyncio.run(run())
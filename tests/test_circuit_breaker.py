@@ -0,0 +1,122 @@
+from typing import List
+
+import pytest
+
+from tele2client import containers, exceptions, time_utils
+from tele2client.circuit_breaker import CircuitBreaker
+from tele2client.enums import CircuitState, Endpoint
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(time_utils, 'monotonic_timestamp', clock)
+    return clock
+
+
+@pytest.fixture
+def transitions() -> List[containers.CircuitTransition]:
+    return []
+
+
+@pytest.fixture
+def breaker(clock, transitions) -> CircuitBreaker:
+    return CircuitBreaker(failure_threshold=2, cooldown=10, on_transition=transitions.append)
+
+
+def get_states(transitions: List[containers.CircuitTransition]) -> List[CircuitState]:
+    return [transition.state for transition in transitions]
+
+
+def open_circuit(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(breaker.acquire(Endpoint.LOTS))
+
+
+def test_opens_after_threshold(breaker, transitions):
+    breaker.record_failure(breaker.acquire(Endpoint.LOTS))
+    assert breaker.get_state(Endpoint.LOTS) == CircuitState.CLOSED
+
+    breaker.record_failure(breaker.acquire(Endpoint.LOTS))
+    assert breaker.get_state(Endpoint.LOTS) == CircuitState.OPEN
+    assert get_states(transitions) == [CircuitState.OPEN]
+
+    with pytest.raises(exceptions.CircuitOpen) as error:
+        breaker.acquire(Endpoint.LOTS)
+    assert error.value.retry_after == pytest.approx(10)
+
+
+def test_success_resets_failures(breaker):
+    breaker.record_failure(breaker.acquire(Endpoint.LOTS))
+    breaker.record(breaker.acquire(Endpoint.LOTS), 200)
+    breaker.record(breaker.acquire(Endpoint.LOTS), 503)
+    assert breaker.get_state(Endpoint.LOTS) == CircuitState.CLOSED
+
+
+def test_endpoints_are_independent(breaker):
+    open_circuit(breaker)
+    breaker.acquire(Endpoint.BALANCE)
+    assert breaker.get_state(Endpoint.BALANCE) == CircuitState.CLOSED
+
+
+def test_per_subscriber(clock):
+    breaker = CircuitBreaker(failure_threshold=1, per_subscriber=True)
+    breaker.record_failure(breaker.acquire(Endpoint.LOTS, '79990000001'))
+    assert breaker.get_state(Endpoint.LOTS, '79990000001') == CircuitState.OPEN
+    assert breaker.get_state(Endpoint.LOTS, '79990000002') == CircuitState.CLOSED
+
+
+def test_half_open_allows_single_probe(breaker, clock, transitions):
+    open_circuit(breaker)
+    clock.now += 10
+
+    probe = breaker.acquire(Endpoint.LOTS)
+    assert probe.probe
+    assert breaker.get_state(Endpoint.LOTS) == CircuitState.HALF_OPEN
+    with pytest.raises(exceptions.CircuitOpen):
+        breaker.acquire(Endpoint.LOTS)
+
+    breaker.record_success(probe)
+    assert get_states(transitions) == [CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED]
+    breaker.acquire(Endpoint.LOTS)
+
+
+def test_failed_probe_reopens(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 10
+
+    breaker.record_failure(breaker.acquire(Endpoint.LOTS))
+    assert breaker.get_state(Endpoint.LOTS) == CircuitState.OPEN
+    with pytest.raises(exceptions.CircuitOpen):
+        breaker.acquire(Endpoint.LOTS)
+
+
+def test_released_probe_can_be_retried(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 10
+
+    breaker.release(breaker.acquire(Endpoint.LOTS))
+    assert breaker.acquire(Endpoint.LOTS).probe
+
+
+def test_late_results_are_ignored(breaker, clock, transitions):
+    late_success = breaker.acquire(Endpoint.LOTS)
+    late_failure = breaker.acquire(Endpoint.LOTS)
+    open_circuit(breaker)
+
+    # Запросы, начатые до открытия, не закрывают выключатель и не продлевают ожидание
+    breaker.record_success(late_success)
+    breaker.record_failure(late_failure)
+    assert breaker.get_state(Endpoint.LOTS) == CircuitState.OPEN
+    assert get_states(transitions) == [CircuitState.OPEN]
+
+    clock.now += 10
+    assert breaker.acquire(Endpoint.LOTS).probe